@@ -1,31 +1,25 @@
 import os
-from collections import Counter
 
-import gensim
-import matplotlib.colors as mcolors
-import matplotlib.pyplot as plt
 import numpy as np
-import statsmodels.api as sm
-from gensim import corpora  # Create Dictionary
-from nltk.corpus import stopwords
-from stargazer.stargazer import Stargazer
+
+# matplotlib, statsmodels and stargazer are imported in the functions that use
+# them, so that collecting the tasks does not import them
 
 
 def make_frequencyplot(data, n=200):
     """Creates frequency plot from a random sample of documents to limit runtime.
 
     Parameters:
-            data: the dataframe
+            data: the lemmas of the speeches (TokenCorpus)
             n: sample size
 
     Returns:
             a figure object
 
     """
-    frequency_distribution = Counter(
-        item for sublist in data["lemma_sep"] for item in sublist
-    )
-    most_common = frequency_distribution.most_common(20)
+    import matplotlib.pyplot as plt
+
+    most_common = data.most_common(20)
 
     fig = plt.figure()
     plt.barh(range(len(most_common)), [val[1] for val in most_common], align="center")
@@ -69,6 +63,23 @@ def _make_labels_dict():
     return dict(zip(labels, clean_labels))
 
 
+# Text attributes that are plotted
+MEASURES = list(_make_labels_dict())
+
+# Columns used by the regressions (all columns of the merged dataset except the
+# lemmas, so that dropna drops the same rows)
+REGRESSION_COLUMNS = [
+    "year",
+    "country",
+    *MEASURES,
+    "flesch_grade",
+    "right",
+    "left",
+    "pop",
+    "CBIE",
+]
+
+
 def make_historical_plots(data):
     """Creates plots over time of the main text attributes.
 
@@ -79,6 +90,8 @@ def make_historical_plots(data):
             a figure object
 
     """
+    import matplotlib.pyplot as plt
+
     plot_data = (
         data[
             [
@@ -120,6 +133,8 @@ def make_crosssectional_plots(data):
             a figure object
 
     """
+    import matplotlib.pyplot as plt
+
     plot_data = (
         data[
             [
@@ -180,6 +195,8 @@ def make_politics_plots(data):
             a figure object
 
     """
+    import matplotlib.pyplot as plt
+
     plot_data = (
         data[
             [
@@ -238,6 +255,8 @@ def make_cbi_pol_plot(data):
             a figure object
 
     """
+    import matplotlib.pyplot as plt
+
     plot_data = (
         data[["CBIE", "left", "right"]]
         .assign(
@@ -267,6 +286,8 @@ def make_cbi_speech_plot(data):
             a figure object
 
     """
+    import matplotlib.pyplot as plt
+
     plot_data = data.reset_index()[
         [
             "left",
@@ -322,6 +343,9 @@ def run_regressions_1(data, table_1):
             none (saves 2 tex files as side effect)
 
     """
+    import statsmodels.api as sm
+    from stargazer.stargazer import Stargazer
+
     data_cl = data.reset_index().dropna()
 
     model_growth_count = sm.OLS.from_formula(
@@ -395,6 +419,7 @@ def run_regressions_1(data, table_1):
     with open(table_1, "w") as f:
         f.write(stargazer.render_latex())
 
+
 def run_regressions_2(data, table_2):
     """Creates tables for speech attribute on politics and CB dependence regressions.
 
@@ -406,6 +431,9 @@ def run_regressions_2(data, table_2):
             none (saves 2 tex files as side effect)
 
     """
+    import statsmodels.api as sm
+    from stargazer.stargazer import Stargazer
+
     data_cl = data.reset_index().dropna()
 
     model_growth_count = sm.OLS.from_formula(
@@ -453,8 +481,6 @@ def run_regressions_2(data, table_2):
         data=data_cl,
     ).fit(cov_type="cluster", cov_kwds={"groups": data_cl["country"]})
 
-
-
     stargazer = Stargazer(
         [
             model_num_words,
@@ -484,4 +510,3 @@ def run_regressions_2(data, table_2):
     )
     with open(table_2, "w") as f:
         f.write(stargazer.render_latex())
-
@@ -0,0 +1,106 @@
+# Import packages
+import subprocess
+import sys
+
+import pandas as pd
+
+### Benchmark of the import time of the task modules
+#
+# Usage: python -m epp_final_project.benchmark_imports [repeat] [module ...]
+#
+# Imports the task modules as pytask does at collection (each in a fresh
+# interpreter with python -X importtime) and prints the seconds per module and the
+# packages that take longest to import. Other modules than the task modules can be
+# passed after the number of runs.
+
+# Modules pytask imports when it collects the tasks
+TASK_MODULES = [
+    "epp_final_project.scrape_bis.task_main",
+    "epp_final_project.data_management.task_main",
+    "epp_final_project.analysis.task_main",
+]
+
+
+def import_times(modules):
+    """Imports modules in a fresh interpreter and returns the time of each import.
+
+    Args:
+        modules: list of module names
+
+    Returns:
+        dataframe with one row per imported module: name, self_s and cumulative_s
+        (seconds including the modules it imports), in the order of -X importtime
+
+    """
+    code = "".join(f"import {module}\n" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        rows.append(
+            {
+                "name": name.strip(),
+                "self_s": int(own) / 1e6,
+                "cumulative_s": int(cumulative) / 1e6,
+            },
+        )
+    return pd.DataFrame(rows, columns=["name", "self_s", "cumulative_s"])
+
+
+def benchmark(modules=None, repeat=3, top=5):
+    """Measures the import time of the task modules, each alone and all together.
+
+    Args:
+        modules: list of module names (None for TASK_MODULES)
+        repeat: number of runs, the fastest one is reported
+        top: number of heaviest packages that are listed per module
+
+    Returns:
+        dataframe with one row per module and one for all modules (collection):
+        seconds and heaviest (top-level packages with the longest cumulative
+        import time)
+
+    """
+    if modules is None:
+        modules = TASK_MODULES
+
+    rows = []
+    for name, imported in [(m, [m]) for m in modules] + [("collection", modules)]:
+        runs = [import_times(imported) for _ in range(repeat)]
+        seconds = [
+            times.loc[times["name"].isin(imported), "cumulative_s"].sum()
+            for times in runs
+        ]
+        fastest = runs[seconds.index(min(seconds))]
+        packages = fastest[
+            ~fastest["name"].str.contains(".", regex=False)
+            & ~fastest["name"].isin(["epp_final_project", "site"])
+        ].nlargest(top, "cumulative_s")
+        rows.append(
+            {
+                "module": name,
+                "seconds": min(seconds),
+                "heaviest": ", ".join(
+                    f"{package} {s:.2f}s"
+                    for package, s in zip(packages["name"], packages["cumulative_s"])
+                ),
+            },
+        )
+
+    return pd.DataFrame(rows).set_index("module")
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    modules = sys.argv[2:] or None
+    with pd.option_context("display.max_colwidth", None):
+        print(
+            benchmark(modules, repeat=repeat).to_string(float_format="{:.3f}".format),
+        )
@@ -10,4 +10,78 @@ PAPER_DIR = SRC.joinpath("..", "..", "paper").resolve()
 
 GROUPS = ["marital_status", "qualification"]
 
-__all__ = ["BLD", "SRC", "TEST_DIR", "GROUPS"]
+# Scraper: requests in flight and requests per second sent to bis.org
+SCRAPE_CONCURRENCY = 16
+SCRAPE_RATE_LIMIT = 8
+
+# Scraper: serve all responses from the http cache without touching the network
+SCRAPE_OFFLINE = False
+
+# Scraper: take the speech ids from the BIS listing pages instead of probing all
+# dates and letters
+SCRAPE_DISCOVERY = False
+
+# Scraper: probe the letters of a date with GET ("get"), HEAD ("head") or HEAD and
+# galloping search ("gallop") requests
+SCRAPE_PROBE = "gallop"
+
+# Text extraction: worker processes (None for all cores) and seconds after which the
+# extraction of one pdf is aborted
+PDF_WORKERS = None
+PDF_TIMEOUT = 300
+
+# Text extraction: backend ("textract", "pdftotext", "pdfminer" or "pypdfium2"),
+# compare them with scrape_bis/benchmark_backends.py; textract returns the whole
+# text of a pdf at once, the other backends stream it page by page
+PDF_BACKEND = "textract"
+
+# Text extraction: pages and bytes of text after which the extraction of one pdf
+# stops (None for no limit); with textract they only cap the txt file, not the
+# memory of the extraction
+PDF_MAX_PAGES = None
+PDF_MAX_BYTES = None
+
+# Data management: number of speeches that are processed at once (None for all)
+DATA_CHUNK_SIZE = 1000
+
+# Data management: processes that clean the speeches (None for all cores, 1 to run
+# serially)
+DATA_WORKERS = None
+
+# Data management: topics whose words are counted in each speech ({topic}_count and
+# {topic}_rate per 1,000 words), words are lemmas
+TOPICS = {
+    "growth": ["growth", "economic"],
+    "inflation": ["inflation", "price"],
+    "inequality": ["inequality", "distribution"],
+    "climate": ["environment", "climate", "green"],
+}
+
+# Data management: folder the NLTK data is stored in, folder or zip file with
+# pre-provisioned NLTK data (None for none) and whether downloads are disabled
+NLTK_DATA = BLD / "nltk_data"
+NLTK_BUNDLE = None
+NLTK_OFFLINE = False
+
+__all__ = [
+    "BLD",
+    "SRC",
+    "TEST_DIR",
+    "GROUPS",
+    "SCRAPE_CONCURRENCY",
+    "SCRAPE_RATE_LIMIT",
+    "SCRAPE_OFFLINE",
+    "SCRAPE_DISCOVERY",
+    "SCRAPE_PROBE",
+    "PDF_WORKERS",
+    "PDF_TIMEOUT",
+    "PDF_BACKEND",
+    "PDF_MAX_PAGES",
+    "PDF_MAX_BYTES",
+    "DATA_CHUNK_SIZE",
+    "DATA_WORKERS",
+    "TOPICS",
+    "NLTK_DATA",
+    "NLTK_BUNDLE",
+    "NLTK_OFFLINE",
+]
@@ -2,26 +2,22 @@
 
 
 # Import packages
-import re
-
-import nltk
-import pandas as pd
-import textstat
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-from nltk.tokenize import word_tokenize
-from textblob import TextBlob
-
-# Download nltk packages
-nltk.download("punkt")
-nltk.download("stopwords")
-nltk.download("wordnet")
-nltk.download("averaged_perceptron_tagger")
-nltk.download("maxent_ne_chunker")
-nltk.download("words")
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from epp_final_project.config import TOPICS
 
 # Import scripts
+import epp_final_project.data_management.lemma_cache as lemma_cache
+import epp_final_project.data_management.nltk_resources as nltk_resources
+import epp_final_project.data_management.normalize as normalize
 import epp_final_project.data_management.populist_data as populist_data
+import epp_final_project.data_management.readability as readability
+import epp_final_project.scrape_bis.institutions as institutions
+import epp_final_project.storage as storage
+import epp_final_project.tokens as tokens
 
 
 ##########################
@@ -29,52 +25,72 @@ import epp_final_project.data_management.populist_data as populist_data
 ##########################
 
 
-def data_proc(df):
-    """Preprocesses the dataset (casefold, remove stop words, tokenize, lemmatize).
+def stop_words():
+    """Returns the set of stop words that are removed from the speeches."""
+    words = set(nltk_resources.stop_words())
+    words.update(normalize.EXTRA_STOP_WORDS)
+    return words
+
+
+def normalize_pool(workers, lemmas):
+    """Returns a process pool for data_proc, whose workers load their own NLTK data.
 
     Args:
-        - dataframe
+        - workers: number of processes (None for all cores, 1 to run serially)
+        - lemmas: LemmaCache whose lemmas the workers start with
+
+    Returns:
+        ProcessPoolExecutor (nullcontext of None if workers is 1), use it in a with
+        statement
 
     """
-    # Read date
-    df["date"] = pd.to_datetime(df["date"])
-    df["year"] = df["date"].dt.year
+    if workers == 1:
+        return contextlib.nullcontext()
+    # Provided before the workers start, so that they do not download it at once
+    nltk_resources.ensure("wordnet")
+    return ProcessPoolExecutor(
+        workers,
+        initializer=normalize.init_worker,
+        initargs=(stop_words(), dict(lemmas)),
+    )
 
-    # Apply casefold (all lowercase and eliminate special characters)
-    df["speech_clean"] = df["speech"].apply(lambda x: x.casefold())
 
-    # Remove all special characters and numericals
-    def clean(text):
-        text = re.sub("[^A-Za-z]+", " ", text)
-        return text
+def data_proc(df, vocab, lemmas=None, pool=None):
+    """Preprocesses the dataset (casefold, remove stop words, tokenize, lemmatize).
 
-    df["speech_clean"] = df["speech_clean"].apply(clean)
+    Adds the lemmas of each speech as int32 ids of vocab (lemma_ids) and as string
+    (lemma). With a pool (see normalize_pool) the speeches are processed in shards
+    across its processes; the result is the same as without.
 
-    # remove stop words
-    stop_words = set(stopwords.words("english"))
-    stop_words.update(["would", "also", "one", "new"])
-    df["speech_clean"] = df["speech_clean"].apply(
-        lambda x: " ".join([word for word in x.split() if word not in (stop_words)]),
-    )
+    Args:
+        - dataframe
+        - vocab: Vocabulary that is shared across chunks (new lemmas are added)
+        - lemmas: LemmaCache that is shared across chunks (None for a new one)
+        - pool: process pool of normalize_pool (None to run serially)
 
-    # tokenize
-    df["token"] = df["speech_clean"].apply(word_tokenize)
+    """
+    import pandas as pd
 
-    # lemmatize (creates two different versions, one comma-separated and the other one not)
-    lemmatizer = WordNetLemmatizer()
+    # Read date
+    df["date"] = pd.to_datetime(df["date"])
+    df["year"] = df["date"].dt.year
 
-    df["lemma_sep"] = df["token"].apply(
-        lambda lst: [lemmatizer.lemmatize(word) for word in lst],
+    # Casefold, remove special characters and numericals, remove stop words,
+    # tokenize and lemmatize in one pass per speech. Each distinct word is
+    # lemmatized once, tokens are looked up in the cache
+    if lemmas is None:
+        lemmas = lemma_cache.LemmaCache()
+
+    results = normalize.normalize_speeches(
+        df["speech"].tolist(),
+        stop_words(),
+        lemmas,
+        pool=pool,
     )
 
-    def lemmatize(data):
-        lemma_rew = " "
-        for word in data:
-            lemma = word
-            lemma_rew = lemma_rew + " " + lemma
-        return lemma_rew
-
-    df["lemma"] = df["lemma_sep"].apply(lemmatize)
+    # Two versions of the lemmas, one as ids and the other one as string
+    df["lemma_ids"] = [vocab.encode(lemma_sep) for lemma_sep, _ in results]
+    df["lemma"] = [lemma for _, lemma in results]
 
     return df
 
@@ -83,41 +99,45 @@ def data_proc(df):
 ##########################
 
 
-def generate_variables(df):
-    ### Tracking Issues over Time
-    # Define a function to count occurrences of a word in a list
-    def count_keywords(keywords, lst):
-        count = 0
-        for word in lst:
-            if word in keywords:
-                count += 1
-        return count
-
-    # Apply the function for different keywords
-    keywords = ["growth", "economic"]
-    df["growth_count"] = df["lemma_sep"].apply(lambda x: count_keywords(keywords, x))
-
-    keywords = ["inflation", "price"]
-    df["inflation_count"] = df["lemma_sep"].apply(lambda x: count_keywords(keywords, x))
-
-    keywords = ["inequality", "distribution"]
-    df["inequality_count"] = df["lemma_sep"].apply(
-        lambda x: count_keywords(keywords, x),
-    )
+def generate_variables(df, vocab, topics=TOPICS):
+    """Generates the topic counts, complexity stats and sentiments of the speeches.
 
-    keywords = ["environment", "climate", "green"]
-    df["climate_count"] = df["lemma_sep"].apply(lambda x: count_keywords(keywords, x))
+    Args:
+        - dataframe
+        - vocab: Vocabulary of lemma_ids
+        - topics: dict of topic names and their words (see TOPICS in config.py)
+
+    """
+    import pandas as pd
+    from textblob import TextBlob
+
+    ### Tracking Issues over Time
+    # Count the words of all topics in one pass over the token ids of all speeches
+    corpus = tokens.TokenCorpus.from_arrays(df["lemma_ids"], vocab)
+    counts = corpus.count_topics(topics)
 
     ### Complexity Stats
+    # Sentences, words and syllables are counted once per speech (and syllables
+    # once per distinct word), all readability scores are computed from these counts
+    scores = pd.DataFrame(
+        [readability.engine().scores(text) for text in df["speech"]],
+        columns=readability.COLUMNS,
+        index=df.index,
+    )
 
     # Number of Words
-    df["num_words"] = df["speech"].apply(lambda x: len(x.split()))
+    df["num_words"] = scores["tokens"]
+
+    # Topic counts and rates per 1,000 words (NaN for speeches without words)
+    num_words = df["num_words"].to_numpy(dtype="float64")
+    num_words[num_words == 0] = np.nan
+    for i, topic in enumerate(topics):
+        df[f"{topic}_count"] = counts[:, i]
+        df[f"{topic}_rate"] = 1000 * counts[:, i] / num_words
 
-    # Some Readability Scores
-    df["flesch_ease"] = df["speech"].apply(textstat.flesch_reading_ease)
-    df["flesch_grade"] = df["speech"].apply(textstat.flesch_kincaid_grade)
-    df["ari"] = df["speech"].apply(textstat.automated_readability_index)
-    df["gunning_fog"] = df["speech"].apply(textstat.gunning_fog)
+    # Some Readability Scores (same as textstat)
+    for score in ["flesch_ease", "flesch_grade", "ari", "gunning_fog"]:
+        df[score] = scores[score]
 
     ### Sentiment Analysis
     def getSubjectivity(text):
@@ -132,14 +152,70 @@ def generate_variables(df):
     return df
 
 
+##########################
+### Process the corpus in chunks
+##########################
+
+# Text columns that are no longer needed after generate_variables
+VARS_DROP = ["speech", "lemma"]
+
+
+def process_in_chunks(path_in, path_out, func, drop=(), chunk_size=1000):
+    """Applies a processing step (data_proc or generate_variables) chunk by chunk.
+
+    Each chunk of speeches is read, processed and written before the next one is
+    read, so the memory use is bounded by the chunk size instead of the size of
+    the corpus.
+
+    Args:
+        path_in: Parquet dataset that is processed
+        path_out: Parquet dataset the result is written to
+        func: function that takes and returns a dataframe
+        drop: columns of the result that are not written
+        chunk_size: number of speeches per chunk (None to process all at once)
+
+    """
+    if chunk_size is None:
+        frames = [storage.read_parquet(path_in)]
+    else:
+        frames = storage.iter_parquet(path_in, batch_size=chunk_size)
+    storage.write_parquet_batches(
+        (func(df).drop(columns=list(drop)) for df in frames),
+        path_out,
+    )
+
+
 ##########################
 ### Merge other data at year-country level
 ##########################
 
+# Topic counts and rates generated by generate_variables
+TOPIC_COLUMNS = [f"{topic}_{kind}" for kind in ("count", "rate") for topic in TOPICS]
+
+# Columns of the speech dataset that are used by merge_data
+MERGE_COLUMNS = [
+    "year",
+    "institution",
+    "lemma_ids",
+    *TOPIC_COLUMNS,
+    "num_words",
+    "flesch_ease",
+    "flesch_grade",
+    "ari",
+    "gunning_fog",
+    "sent_subj",
+    "sent_pol",
+]
+
 
 def merge_data(speech_df, cbi_df_path):
+    import pandas as pd
+
+    # Map institutions to their canonical name (same matcher as in the scraper)
     speech_df["institution"] = speech_df["institution"].astype("str")
-    speech_df["institution"] = speech_df["institution"].str.replace(" ", "", 1)
+    speech_df["institution"] = speech_df["institution"].map(
+        institutions.canonical_institution,
+    )
     speech_df["year"] = speech_df["year"].astype("int64")
 
     ## Get other datasets
@@ -173,11 +249,8 @@ def merge_data(speech_df, cbi_df_path):
     cols = [
         "year",
         "country",
-        "lemma_sep",
-        "growth_count",
-        "inflation_count",
-        "inequality_count",
-        "climate_count",
+        "lemma_ids",
+        *TOPIC_COLUMNS,
         "num_words",
         "flesch_ease",
         "flesch_grade",
@@ -201,25 +274,23 @@ def merge_data(speech_df, cbi_df_path):
 ### Collapse
 ##########################
 
+# Columns that are averaged by year and country
+COLLAPSE_COLUMNS = [
+    *TOPIC_COLUMNS,
+    "num_words",
+    "flesch_ease",
+    "flesch_grade",
+    "ari",
+    "gunning_fog",
+    "sent_subj",
+    "sent_pol",
+    "right",
+    "left",
+    "pop",
+]
 
-def collapse(df):
-    cols = [
-        "growth_count",
-        "inflation_count",
-        "inequality_count",
-        "climate_count",
-        "num_words",
-        "flesch_ease",
-        "flesch_grade",
-        "ari",
-        "gunning_fog",
-        "sent_subj",
-        "sent_pol",
-        "right",
-        "left",
-        "pop",
-    ]
 
-    grouped_df = df.groupby(["year", "country"])[cols].mean().reset_index()
+def collapse(df):
+    grouped_df = df.groupby(["year", "country"])[COLLAPSE_COLUMNS].mean().reset_index()
 
     return grouped_df
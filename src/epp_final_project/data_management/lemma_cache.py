@@ -0,0 +1,94 @@
+# Import packages
+import importlib.metadata
+import os
+import sqlite3
+
+# Import scripts
+import epp_final_project.data_management.nltk_resources as nltk_resources
+
+### Lemmas of the vocabulary, computed once per word
+
+
+class LemmaCache(dict):
+    """Maps words to their lemma and lemmatizes each distinct word only once.
+
+    The corpus has far fewer distinct words than tokens, so looking the tokens up
+    in this table is much cheaper than lemmatizing every token. Words that are not
+    in the table yet are lemmatized on first lookup (cache[word]).
+
+    With a path, the table is loaded from path/{version}.sqlite and save() adds the
+    new words to it, so later runs only lemmatize words they have not seen before.
+    The version (by default the nltk version) keeps lemmas of different lemmatizers
+    apart. WordNet is only loaded once a word is not in the cache.
+
+    Args:
+        path: folder of the persistent cache (None to keep the cache in memory)
+        lemmatize: function that returns the lemma of a word (None for WordNet)
+        version: name of the lemmatizer and its version
+
+    """
+
+    def __init__(self, path=None, lemmatize=None, version=None):
+        super().__init__()
+        self.lemmatize = lemmatize
+        self.new = {}
+        self.path = None
+        if path is not None:
+            os.makedirs(str(path), exist_ok=True)
+            nltk_version = importlib.metadata.version("nltk")
+            version = version or f"wordnet-nltk{nltk_version}"
+            self.path = os.path.join(str(path), version + ".sqlite")
+            conn = self._connect()
+            self.update(conn.execute("SELECT word, lemma FROM lemmas"))
+            conn.close()
+
+    def __missing__(self, word):
+        if self.lemmatize is None:
+            self.lemmatize = nltk_resources.lemmatizer().lemmatize
+        lemma = self.lemmatize(word)
+        self[word] = lemma
+        self.new[word] = lemma
+        return lemma
+
+    def merge(self, lemmas):
+        """Adds lemmas computed elsewhere (e.g. in a worker process) to the cache.
+
+        Args:
+            lemmas: dict of words and their lemma
+
+        """
+        for word, lemma in lemmas.items():
+            if word not in self:
+                self[word] = lemma
+                self.new[word] = lemma
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=60)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS lemmas (
+                word TEXT PRIMARY KEY,
+                lemma TEXT NOT NULL
+            )
+            """,
+        )
+        return conn
+
+    def save(self):
+        """Adds the words lemmatized since the last save to the persistent cache.
+
+        Returns:
+            number of words that were added
+
+        """
+        added = len(self.new)
+        if self.path is not None and self.new:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO lemmas VALUES (?, ?)",
+                    self.new.items(),
+                )
+            conn.close()
+        self.new = {}
+        return added
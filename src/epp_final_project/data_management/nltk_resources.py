@@ -0,0 +1,99 @@
+# Import packages
+import functools
+import os
+import zipfile
+
+from epp_final_project.config import NLTK_BUNDLE
+from epp_final_project.config import NLTK_DATA
+from epp_final_project.config import NLTK_OFFLINE
+
+### NLTK data, looked up and loaded on first use
+
+# NLTK packages used by the project and the path of their data in nltk_data
+RESOURCES = {
+    "cmudict": "corpora/cmudict",
+    "stopwords": "corpora/stopwords",
+    "wordnet": "corpora/wordnet",
+}
+
+
+def _search_path(cache_dir, bundle):
+    """Adds the cache folder (and a bundle folder) to the search path of NLTK."""
+    import nltk
+
+    paths = [str(cache_dir)]
+    if bundle is not None and os.path.isdir(str(bundle)):
+        paths.append(str(bundle))
+    for path in reversed(paths):
+        if path not in nltk.data.path:
+            nltk.data.path.insert(0, path)
+
+
+def _find(name):
+    import nltk
+
+    try:
+        nltk.data.find(RESOURCES[name])
+        return True
+    except LookupError:
+        return False
+
+
+def ensure(name, cache_dir=NLTK_DATA, bundle=NLTK_BUNDLE, offline=NLTK_OFFLINE):
+    """Makes an NLTK package available, without network access if possible.
+
+    The package is looked up in the cache folder, the bundle and the default NLTK
+    folders. If it is missing, it is unpacked from the bundle (a zip file laid out
+    like nltk_data) into the cache folder or, unless offline, downloaded into the
+    cache folder.
+
+    Args:
+        name: name of the package (key of RESOURCES)
+        cache_dir: folder the packages are stored in
+        bundle: folder or zip file with pre-provisioned packages (None for none)
+        offline: if True, never download
+
+    """
+    _search_path(cache_dir, bundle)
+    if _find(name):
+        return
+
+    if bundle is not None and zipfile.is_zipfile(str(bundle)):
+        prefix = RESOURCES[name] + "/"
+        with zipfile.ZipFile(str(bundle)) as archive:
+            members = [
+                member
+                for member in archive.namelist()
+                if member.startswith(prefix) or member == RESOURCES[name] + ".zip"
+            ]
+            archive.extractall(str(cache_dir), members=members)
+        if _find(name):
+            return
+
+    if offline:
+        raise LookupError(
+            f"NLTK package {name} is not in {cache_dir} or the bundle {bundle} and "
+            "downloads are disabled (NLTK_OFFLINE)",
+        )
+    import nltk
+
+    os.makedirs(str(cache_dir), exist_ok=True)
+    if not nltk.download(name, download_dir=str(cache_dir), quiet=True):
+        raise LookupError(f"NLTK package {name} could not be downloaded")
+
+
+@functools.lru_cache(maxsize=None)
+def stop_words():
+    """Returns the English stop words of NLTK (loaded once per process)."""
+    ensure("stopwords")
+    from nltk.corpus import stopwords
+
+    return frozenset(stopwords.words("english"))
+
+
+def lemmatizer():
+    """Returns a WordNet lemmatizer, whose data is available."""
+    ensure("wordnet")
+    from nltk.stem import WordNetLemmatizer
+
+    return WordNetLemmatizer()
@@ -0,0 +1,129 @@
+# Import packages
+import re
+
+# Import scripts
+import epp_final_project.data_management.lemma_cache as lemma_cache
+
+### Text normalization in one pass per speech
+
+# Words of letters (all other characters separate words)
+WORD = re.compile("[A-Za-z]+")
+
+# Words of letters only that word_tokenize splits (contractions of the Treebank
+# tokenizer)
+SPLITS = {
+    "cannot": ("can", "not"),
+    "gimme": ("gim", "me"),
+    "gonna": ("gon", "na"),
+    "gotta": ("got", "ta"),
+    "lemme": ("lem", "me"),
+    "wanna": ("wan", "na"),
+}
+
+# Words that are removed in addition to the NLTK stop words
+EXTRA_STOP_WORDS = ["would", "also", "one", "new"]
+
+
+def normalize_speech(text, stop_words, lemmatize):
+    """Cleans, tokenizes, removes stop words and lemmatizes a speech in one pass.
+
+    Gives the same lemmas as applying casefold, re.sub("[^A-Za-z]+", " ", ...), the
+    stop word filter, word_tokenize and the lemmatizer one after the other.
+
+    Args:
+        text: string
+        stop_words: set of words that are removed
+        lemmatize: function that returns the lemma of a word
+
+    Returns:
+        list of lemmas (lemma_sep) and the lemmas joined by spaces (lemma)
+
+    """
+    lemmas = []
+    for word in WORD.findall(text.casefold()):
+        if word in stop_words:
+            continue
+        split = SPLITS.get(word)
+        if split is None:
+            lemmas.append(lemmatize(word))
+        else:
+            lemmas.extend(lemmatize(part) for part in split)
+
+    # A space, then a space before each lemma (as built word by word before)
+    lemma = "  " + " ".join(lemmas) if lemmas else " "
+    return lemmas, lemma
+
+
+### Normalization in worker processes
+
+# Number of speeches that are sent to a worker at once
+SHARD_SIZE = 20
+
+# Stop words and lemma cache of the worker process (set by init_worker)
+_worker = {}
+
+
+def init_worker(stop_words, known_lemmas):
+    """Sets up the stop words and lemmatizer of a worker process.
+
+    Each worker has its own lemmatizer and lemma cache, which starts with the
+    lemmas known when the pool was created and is kept across shards.
+
+    Args:
+        stop_words: set of words that are removed
+        known_lemmas: dict of words and their lemma
+
+    """
+    lemmas = lemma_cache.LemmaCache()
+    lemmas.update(known_lemmas)
+    _worker["stop_words"] = stop_words
+    _worker["lemmas"] = lemmas
+
+
+def normalize_shard(texts):
+    """Normalizes a shard of speeches in a worker process (see init_worker).
+
+    Args:
+        texts: list of strings
+
+    Returns:
+        list of results of normalize_speech (in the order of texts) and dict of
+        the words the worker lemmatized for the first time
+
+    """
+    lemmas = _worker["lemmas"]
+    results = [
+        normalize_speech(text, _worker["stop_words"], lemmas.__getitem__)
+        for text in texts
+    ]
+    new, lemmas.new = lemmas.new, {}
+    return results, new
+
+
+def normalize_speeches(texts, stop_words, lemmas, pool=None):
+    """Normalizes speeches, in shards across a process pool if one is given.
+
+    The results are in the order of texts and the same as without pool. The words
+    lemmatized by the workers are added to lemmas.
+
+    Args:
+        texts: list of strings
+        stop_words: set of words that are removed
+        lemmas: LemmaCache
+        pool: ProcessPoolExecutor set up with init_worker (None to run serially)
+
+    Returns:
+        list of results of normalize_speech
+
+    """
+    if pool is None:
+        return [
+            normalize_speech(text, stop_words, lemmas.__getitem__) for text in texts
+        ]
+
+    shards = [texts[i : i + SHARD_SIZE] for i in range(0, len(texts), SHARD_SIZE)]
+    results = []
+    for shard_results, new in pool.map(normalize_shard, shards):
+        results.extend(shard_results)
+        lemmas.merge(new)
+    return results
@@ -1,5 +1,5 @@
-# Import packages
-import pandas as pd
+# Import scripts
+import epp_final_project.scrape_bis.institutions as institutions
 
 
 # Create populism dataset
@@ -15,6 +15,8 @@ def get_populists():
     Source: Funke, Manuel, Moritz Schularick, and Christoph Trebesch. "Populist leaders and the economy." (2020).
 
     """
+    import pandas as pd
+
     ### create long dataset to merge with
     years = list(range(1997, 2024))
     countries = [
@@ -171,78 +173,18 @@ def get_populists():
 
 ### Get dataframe that maps institutions to countries
 def inst_to_country():
-    """Returns dataframe that maps institutions to countries."""
+    """Returns dataframe that maps institutions to countries.
+
+    The mapping is taken from the institution table of the scraper
+    (scrape_bis.lists.institution_aliases), institutions without country are dropped.
+
+    """
+    import pandas as pd
+
     dict = {
-        "central bank of argentina": "Argentina",
-        "reserve bank of australia": "Australia",
-        "central bank of the republic of austria": "Austria",
-        "national bank of belgium": "Belgium",
-        "central bank of bolivia": "Bolivia",
-        "central bank of brazil": "Brazil",
-        "bulgarian national bank": "Bulgaria",
-        "bank of canada": "Canada",
-        "central bank of chile": "Chile",
-        "people's bank of china": "China",
-        "central bank of colombia": "Colombia",
-        "croatian national bank": "Croatia",
-        "central bank of cyprus": "Cyprus",
-        "czech national bank": "Czech Republic",
-        "national bank of denmark": "Denmark",
-        "central bank of ecuador": "Ecuador",
-        "central bank of egypt": "Egypt",
-        "bank of estonia": "Estonia",
-        "bank of finland": "Finland",
-        "bank of france": "France",
-        "deutsche bundesbank": "Germany",
-        "bank of greece": "Greece",
-        "central bank of hungary": "Hungary",
-        "central bank of iceland": "Iceland",
-        "reserve bank of india": "India",
-        "bank indonesia": "Indonesia",
-        "central bank of ireland": "Ireland",
-        "bank of israel": "Israel",
-        "bank of italy": "Italy",
-        "bank of japan": "Japan",
-        "bank of latvia": "Latvia",
-        "bank of lithuania": "Lithuania",
-        "central bank of luxembourg": "Luxembourg",
-        "central bank of malaysia": "Malaysia",
-        "central bank of malta": "Malta",
-        "bank of mexico": "Mexico",
-        "netherlands bank": "Netherlands",
-        "reserve bank of new zealand": "New Zealand",
-        "central bank of norway": "Norway",
-        "central bank of paraguay": "Paraguay",
-        "central reserve bank of peru": "Peru",
-        "central bank of the philippines": "Philippines",
-        "bank of poland": "Poland",
-        "bank of portugal": "Portugal",
-        "national bank of romania": "Romania",
-        "bank of russia": "Russia",
-        "national bank of slovakia": "Slovakia",
-        "bank of slovenia": "Slovenia",
-        "south african reserve bank": "South Africa",
-        "bank of korea": "South Korea",
-        "bank of spain": "Spain",
-        "sveriges riksbank": "Sweden",
-        "swiss national bank": "Switzerland",
-        "bank of thailand": "Thailand",
-        "central bank of the republic of turkey": "Turkey",
-        "bank of england": "United Kingdom",
-        "board of governors of the federal reserve system": "United States",
-        "federal reserve bank of kansas city": "United States",
-        "federal reserve bank of new york": "United States",
-        "federal reserve bank of san francisco": "United States",
-        "federal reserve bank of boston": "United States",
-        "federal reserve bank of chicago": "United States",
-        "federal reserve bank of dallas": "United States",
-        "federal reserve bank of minneapolis": "United States",
-        "federal reserve bank of philadelphia": "United States",
-        "federal reserve bank of atlanta": "United States",
-        "federal reserve bank of richmond": "United States",
-        "central bank of uruguay": "Uruguay",
-        "central bank of venezuela": "Venezuela",
-        "european central bank": "ECB",
+        inst: country
+        for inst, country in institutions.COUNTRIES.items()
+        if country is not None
     }
 
     cb_country = pd.DataFrame(dict.items(), columns=["institution", "country"])
@@ -0,0 +1,184 @@
+# Import packages
+import functools
+import importlib.resources
+import re
+
+# Import scripts
+import epp_final_project.data_management.nltk_resources as nltk_resources
+
+### Readability indices from counts that are shared by all indices
+#
+# Gives the same numbers as flesch_reading_ease, flesch_kincaid_grade,
+# automated_readability_index and gunning_fog of textstat (English, no rounding),
+# but the text is split into sentences and words and the syllables are counted only
+# once per speech, and once per distinct word.
+
+# Constants of textstat for English
+FRE_BASE = 206.835
+FRE_SENTENCE_LENGTH = 1.015
+FRE_SYLLABLES_PER_WORD = 84.6
+FOG_SYLLABLE_THRESHOLD = 3
+
+# Sentences and words as split by textstat
+SENTENCE = re.compile(r"\b[^.!?]+[.!?]*")
+NONCONTRACTION_APOSTROPHE = re.compile(r"\'(?!" + r"[tsd]|ve|ll|re" + ")")
+PUNCTUATION = re.compile(r"[^\w\s\']")
+SPACE = re.compile(r"\s")
+
+# Whitespace-separated chunks that keep a character after removing punctuation, so
+# that len(WORD_CHUNK.findall(text)) == len(list_words(text)) without copying text
+WORD_CHUNK = re.compile(r"\S*?(?:\w|\'(?=[tsd]|ve|ll|re))\S*")
+
+# Columns of Readability.scores
+COLUMNS = [
+    "sentences",
+    "words",
+    "tokens",
+    "chars",
+    "syllables",
+    "difficult_words",
+    "flesch_ease",
+    "flesch_grade",
+    "ari",
+    "gunning_fog",
+]
+
+
+def list_words(text):
+    """Returns the words of a text without punctuation (except contractions)."""
+    return PUNCTUATION.sub("", NONCONTRACTION_APOSTROPHE.sub("", text)).split()
+
+
+class Syllables(dict):
+    """Maps words (lower case) to their number of syllables, counted once per word.
+
+    The syllables are counted in the CMU pronouncing dictionary and, for words that
+    are not in it, with the hyphenation patterns of pyphen (as textstat does).
+
+    Args:
+        lang: language of the hyphenation patterns
+
+    """
+
+    def __init__(self, lang="en_US"):
+        super().__init__()
+        self.lang = lang
+        self.cmudict = None
+        self.pyphen = None
+
+    def __missing__(self, word):
+        if self.cmudict is None:
+            from pyphen import Pyphen
+
+            nltk_resources.ensure("cmudict")
+            from nltk.corpus import cmudict
+
+            self.cmudict = cmudict.dict()
+            self.pyphen = Pyphen(lang=self.lang)
+        try:
+            phones = self.cmudict[word][0]
+            count = sum(1 for phone in phones if phone[-1].isdigit())
+        except (TypeError, IndexError, KeyError):
+            count = len(self.pyphen.positions(word)) + 1
+        self[word] = count
+        return count
+
+
+def _easy_words():
+    path = importlib.resources.files("textstat").joinpath("resources/en/easy_words.txt")
+    with path.open() as f:
+        return {line.strip() for line in f}
+
+
+def count(text, syllables, easy_words):
+    """Counts sentences, words, characters, syllables and difficult words of a text.
+
+    Args:
+        text: string
+        syllables: Syllables
+        easy_words: set of words that are never difficult (Dale-Chall list)
+
+    Returns:
+        dict of counts
+
+    """
+    words = list_words(text)
+    sentences = SENTENCE.findall(text)
+    short_sentences = sum(
+        1 for sentence in sentences if len(WORD_CHUNK.findall(sentence)) <= 2
+    )
+
+    n_syllables = 0
+    difficult_words = 0
+    for word in words:
+        word = word.lower()
+        n = syllables[word]
+        n_syllables += n
+        if n >= FOG_SYLLABLE_THRESHOLD and word not in easy_words:
+            difficult_words += 1
+
+    return {
+        "sentences": max(1, len(sentences) - short_sentences) if text else 0,
+        "words": len(words),
+        "tokens": len(text.split()),
+        "chars": len(SPACE.sub("", text)),
+        "syllables": n_syllables,
+        "difficult_words": difficult_words,
+    }
+
+
+def indices(counts):
+    """Computes the readability indices from the counts of a text.
+
+    Returns:
+        dict with flesch_ease, flesch_grade, ari and gunning_fog (0 for empty texts,
+        as in textstat)
+
+    """
+    words = counts["words"]
+    words_per_sentence = words / counts["sentences"] if counts["sentences"] else 0.0
+    syllables_per_word = counts["syllables"] / words if words else 0.0
+    chars_per_word = counts["chars"] / counts["tokens"] if counts["tokens"] else 0.0
+
+    scores = {"flesch_ease": 0.0, "flesch_grade": 0.0, "ari": 0.0, "gunning_fog": 0.0}
+    if words_per_sentence != 0 and syllables_per_word != 0:
+        scores["flesch_ease"] = (
+            FRE_BASE
+            - FRE_SENTENCE_LENGTH * words_per_sentence
+            - FRE_SYLLABLES_PER_WORD * syllables_per_word
+        )
+        scores["flesch_grade"] = (
+            (0.39 * words_per_sentence) + (11.8 * syllables_per_word) - 15.59
+        )
+    if chars_per_word != 0 and words_per_sentence != 0:
+        scores["ari"] = (4.71 * chars_per_word) + (0.5 * words_per_sentence) - 21.43
+    if words:
+        per_difficult_words = 100 * counts["difficult_words"] / words
+        scores["gunning_fog"] = 0.4 * (words_per_sentence + per_difficult_words)
+    return scores
+
+
+class Readability:
+    """Computes the readability indices of texts with one syllable table.
+
+    The syllable table and the list of easy words are kept across texts, so the
+    syllables of each distinct word are only counted once.
+
+    """
+
+    def __init__(self):
+        self.syllables = Syllables()
+        self.easy_words = None
+
+    def scores(self, text):
+        """Returns the counts (see count) and indices (see indices) of a text."""
+        if self.easy_words is None:
+            self.easy_words = _easy_words()
+        counts = count(text, self.syllables, self.easy_words)
+        return {**counts, **indices(counts)}
+
+
+@functools.lru_cache(maxsize=None)
+def engine():
+    """Returns the Readability of the process (shared by all chunks)."""
+    return Readability()
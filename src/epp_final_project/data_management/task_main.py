@@ -2,68 +2,106 @@
 
 from epp_final_project.config import BLD
 from epp_final_project.config import SRC
+from epp_final_project.config import DATA_CHUNK_SIZE
+from epp_final_project.config import DATA_WORKERS
 
 # Import packages
+import functools
 import os
 import pytask
 
 # Import scripts
 import epp_final_project.data_management.functions as f
-
-# Import packages
-import os
-import pandas as pd
-
+import epp_final_project.data_management.lemma_cache as lemma_cache
+import epp_final_project.storage as storage
+import epp_final_project.tokens as tokens
 
 
 ##########################.
 # Data cleaning & Pre-Processing (takes < 10 min)
 ##########################
 
-@pytask.mark.depends_on(BLD / "data" / "raw" /"merged_raw.pickle")
-@pytask.mark.produces(BLD / "data" / "raw" /"merged_processed.pickle") 
+
+@pytask.mark.depends_on(BLD / "data" / "raw" / "merged_raw.parquet")
+@pytask.mark.produces(
+    {
+        "path_data": BLD / "data" / "raw" / "merged_processed.parquet",
+        "path_vocab": BLD / "data" / "raw" / "vocab.txt",
+    }
+)
 def task_cleaning(depends_on, produces):
-    df = pd.read_pickle(depends_on)
-    df_processed = f.data_proc(df)
-    df_processed.to_pickle(produces)
+    # Lemmas are cached across chunks and runs, only new words are lemmatized
+    lemmas = lemma_cache.LemmaCache(BLD / "data" / "raw" / "lemma_cache")
+
+    # Lemmas are stored as ids of one vocabulary shared by all chunks
+    vocab = tokens.Vocabulary()
+
+    # Chunks of DATA_CHUNK_SIZE speeches, written one after the other. The speeches
+    # of a chunk are processed in shards across DATA_WORKERS processes
+    with f.normalize_pool(DATA_WORKERS, lemmas) as pool:
+        f.process_in_chunks(
+            depends_on,
+            produces["path_data"],
+            functools.partial(f.data_proc, vocab=vocab, lemmas=lemmas, pool=pool),
+            chunk_size=DATA_CHUNK_SIZE,
+        )
+    lemmas.save()
+    vocab.save(produces["path_vocab"])
 
 
 ##########################
 # Generate variables
 ##########################
 
-@pytask.mark.depends_on(BLD / "data" / "raw" /"merged_processed.pickle")
-@pytask.mark.produces(BLD / "data" / "raw" /"merged_processed_vars.pickle") 
+
+@pytask.mark.depends_on(
+    {
+        "path_data": BLD / "data" / "raw" / "merged_processed.parquet",
+        "path_vocab": BLD / "data" / "raw" / "vocab.txt",
+    }
+)
+@pytask.mark.produces(BLD / "data" / "raw" / "merged_processed_vars.parquet")
 def task_generate_variables(depends_on, produces):
-    df = pd.read_pickle(depends_on)
-    df_variables = f.generate_variables(df)
-    df_variables.to_pickle(produces)
+    vocab = tokens.Vocabulary.load(depends_on["path_vocab"])
+    f.process_in_chunks(
+        depends_on["path_data"],
+        produces,
+        functools.partial(f.generate_variables, vocab=vocab),
+        drop=f.VARS_DROP,
+        chunk_size=DATA_CHUNK_SIZE,
+    )
 
 
 ##########################
 ### Merge other data at year-country level
 ##########################
 
+
 @pytask.mark.depends_on(
     {
-        "path_speech": BLD / "data" / "raw" /"merged_processed_vars.pickle",
-        "path_cbi": SRC /  "data" /"CBIData_Romelli2022.xlsx"
+        "path_speech": BLD / "data" / "raw" / "merged_processed_vars.parquet",
+        "path_cbi": SRC / "data" / "CBIData_Romelli2022.xlsx",
     }
 )
-@pytask.mark.produces(BLD / "data" / "merged_final_ind.pickle") 
+@pytask.mark.produces(BLD / "data" / "merged_final_ind.parquet")
 def task_merge_data(depends_on, produces):
-    df = pd.read_pickle(depends_on["path_speech"])
+    # Only the columns used by merge_data (not the text columns)
+    df = storage.read_parquet(depends_on["path_speech"], columns=f.MERGE_COLUMNS)
     df_merged = f.merge_data(df, depends_on["path_cbi"])
-    df_merged.to_pickle(produces)
+    storage.write_parquet(df_merged, produces)
 
 
 ##########################
 ### Collapse
 ##########################
 
-@pytask.mark.depends_on(BLD / "data" / "merged_final_ind.pickle")
-@pytask.mark.produces(BLD / "data" / "merged_final_collapse.pickle") 
+
+@pytask.mark.depends_on(BLD / "data" / "merged_final_ind.parquet")
+@pytask.mark.produces(BLD / "data" / "merged_final_collapse.parquet")
 def task_collapse(depends_on, produces):
-    df = pd.read_pickle(depends_on)
+    df = storage.read_parquet(
+        depends_on,
+        columns=["year", "country"] + f.COLLAPSE_COLUMNS,
+    )
     df_grouped = f.collapse(df)
-    df_grouped.to_pickle(produces)
\ No newline at end of file
+    storage.write_parquet(df_grouped, produces)
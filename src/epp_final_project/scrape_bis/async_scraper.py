@@ -0,0 +1,538 @@
+# Import packages
+import asyncio
+import os
+import string
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+# Import scripts
+import epp_final_project.scrape_bis.bis_scraper as bis
+import epp_final_project.scrape_bis.crawl_index as crawl_index
+import epp_final_project.scrape_bis.lists as lists
+import epp_final_project.scrape_bis.meta_store as meta_store
+import epp_final_project.scrape_bis.pdf_store as pdf_store
+import epp_final_project.scrape_bis.probing as probing
+import epp_final_project.scrape_bis.rate_control as rate_control
+
+### Helpers for the asynchronous scraper
+
+
+class HostRateLimiter:
+    """Spaces out the requests sent to one host.
+
+    Args:
+        rate: maximum number of requests per second (None or 0 for no limit)
+
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_slot = 0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        """Waits until the next request to the host may be sent."""
+        async with self.lock:
+            now = asyncio.get_running_loop().time()
+            delay = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class Fetcher:
+    """Sends GET and HEAD requests with adaptive concurrency.
+
+    One keep-alive session, one rate limiter and one rate_control.AdaptiveLimiter
+    are opened per host and reused for all requests to that host. Throttled
+    (429/503), failed (5xx) and timed out requests are retried with jittered
+    exponential backoff.
+
+    Args:
+        max_concurrency: maximum number of requests in flight per host
+        rate_limit: maximum number of requests per second and host
+        cache: http_cache.HttpCache the responses are served from and stored in
+        max_retries: number of retries per request
+        timeout: seconds after which a request is aborted
+
+    """
+
+    def __init__(
+        self, max_concurrency, rate_limit, cache=None, max_retries=5, timeout=60
+    ):
+        import aiohttp
+
+        self.max_concurrency = max_concurrency
+        self.rate_limit = rate_limit
+        self.cache = cache
+        self.max_retries = max_retries
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.sessions = {}
+        self.limiters = {}
+        self.controllers = {}
+        self.stats = Counter()
+
+    def _session(self, host):
+        import aiohttp
+
+        if host not in self.sessions:
+            connector = aiohttp.TCPConnector(limit_per_host=self.max_concurrency)
+            self.sessions[host] = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+            )
+            self.limiters[host] = HostRateLimiter(self.rate_limit)
+            self.controllers[host] = rate_control.AdaptiveLimiter(
+                max_limit=self.max_concurrency,
+            )
+        return self.sessions[host], self.limiters[host], self.controllers[host]
+
+    async def _request(self, method, url, headers=None, sink=None):
+        """Returns status code, body and headers of the response, retrying if needed.
+
+        If sink (a pdf_store.PdfWriter) is given, the body of a 200 response is
+        streamed to it instead of being returned.
+
+        """
+        import aiohttp
+
+        session, limiter, controller = self._session(urlsplit(url).netloc)
+
+        for attempt in range(self.max_retries + 1):
+            await controller.acquire()
+            status = None
+            retry_after = None
+            latency = self.timeout.total
+            try:
+                await limiter.wait()
+                start = time.monotonic()
+                async with session.request(
+                    method,
+                    url,
+                    headers=headers,
+                    allow_redirects=True,
+                ) as response:
+                    latency = time.monotonic() - start
+                    status = response.status
+                    content = b""
+                    if sink is not None and status == 200:
+                        sink.reset()
+                        async for chunk in response.content.iter_chunked(
+                            pdf_store.CHUNK_SIZE,
+                        ):
+                            sink.write(chunk)
+                    elif method == "GET":
+                        content = await response.read()
+                    response_headers = response.headers
+                    retry_after = response.headers.get("Retry-After")
+            except (asyncio.TimeoutError, aiohttp.ClientError):
+                status = None
+                if attempt == self.max_retries:
+                    raise
+            finally:
+                await controller.release(latency, status)
+
+            if status is not None and (
+                status not in rate_control.RETRY_STATUS or attempt == self.max_retries
+            ):
+                return status, content, response_headers
+
+            if retry_after is not None and retry_after.isdigit():
+                retry_after = int(retry_after)
+            else:
+                retry_after = None
+            await asyncio.sleep(controller.retry_delay(attempt, retry_after))
+
+    async def get(self, url, max_age=None):
+        """Returns status code and body of url.
+
+        Cached responses older than max_age are revalidated (None for the max_age and
+        ttl_404 of the cache).
+
+        """
+        entry = None
+        headers = {}
+        if self.cache is not None:
+            entry = self.cache.lookup(url)
+            fresh = entry is not None and self.cache.is_fresh(entry, max_age)
+            if entry is not None and (self.cache.offline or fresh):
+                self.stats["cached"] += 1
+                return entry["status"], entry["content"]
+            if self.cache.offline:
+                return self.cache.status_miss, b""
+            headers = self.cache.validators(entry)
+
+        status, content, response_headers = await self._request("GET", url, headers)
+        self.stats["get"] += 1
+        self.stats["bytes"] += len(content)
+
+        if self.cache is not None:
+            if status == 304 and entry is not None:
+                self.cache.refresh(url, entry)
+                return entry["status"], entry["content"]
+            self.cache.store(url, status, response_headers, content)
+        return status, content
+
+    async def download(self, url, writer, speech_id):
+        """Streams the pdf at url to the content-addressed store.
+
+        Args:
+            url: url of the pdf
+            writer: pdf_store.PdfWriter
+            speech_id: date in format 210101 plus letter, e.g. 210101a
+
+        Returns:
+            path of the pdf and its SHA-256, (None, None) if the pdf is not available
+
+        """
+        entry = None
+        headers = {}
+        if self.cache is not None:
+            entry = self.cache.lookup(url, load=False)
+            if entry is not None and (self.cache.offline or self.cache.is_fresh(entry)):
+                self.stats["cached"] += 1
+                if entry["status"] != 200:
+                    return None, None
+                writer.write_file(entry["path"])
+                return writer.commit(speech_id)
+            if self.cache.offline:
+                return None, None
+            headers = self.cache.validators(entry)
+
+        status, _, response_headers = await self._request("GET", url, headers, writer)
+        self.stats["get"] += 1
+
+        if status == 304 and entry is not None:
+            self.cache.refresh(url, entry)
+            writer.write_file(entry["path"])
+            return writer.commit(speech_id)
+        if status != 200:
+            if self.cache is not None:
+                self.cache.store(url, status, response_headers, b"")
+            return None, None
+
+        self.stats["bytes"] += writer.size
+        path_pdf, sha = writer.commit(speech_id)
+        if self.cache is not None:
+            self.cache.store_file(url, 200, response_headers, path_pdf)
+        return path_pdf, sha
+
+    async def head(self, url, max_age=None):
+        """Returns status code of a HEAD request to url.
+
+        Cached responses older than max_age are requested again (None for the ttl of
+        the cache).
+
+        """
+        if self.cache is not None:
+            entry = self.cache.lookup(url)
+            fresh = entry is not None and self.cache.is_fresh(entry, max_age)
+            if entry is not None and (self.cache.offline or fresh):
+                self.stats["cached"] += 1
+                return entry["status"]
+            if self.cache.offline:
+                return self.cache.status_miss
+
+        status, _, response_headers = await self._request("HEAD", url)
+        self.stats["head"] += 1
+
+        # Store misses, so that they are not requested again before the ttl has passed
+        if self.cache is not None and status == 404:
+            self.cache.store(url, 404, response_headers, b"")
+        return status
+
+    def snapshot(self):
+        """Returns the live counters of the rate controllers per host."""
+        return {host: c.snapshot() for host, c in self.controllers.items()}
+
+    async def close(self):
+        """Closes all open sessions."""
+        for session in self.sessions.values():
+            await session.close()
+
+
+### Function for scraping the data
+
+
+def _record(conn, speech_id, status, path_pdf=None, path_meta=None, sha256=None):
+    if conn is not None:
+        crawl_index.record_probe(conn, speech_id, status, path_pdf, path_meta, sha256)
+
+
+async def _download_pdf(fetcher, wd, url, date, inc, conn, store):
+    writer = pdf_store.PdfWriter(wd)
+    try:
+        path_pdf, sha = await fetcher.download(
+            url + date + inc + bis.END_PDF,
+            writer,
+            date + inc,
+        )
+    except Exception:
+        path_pdf, sha = None, None
+    finally:
+        writer.discard()
+
+    if sha is not None:
+        meta_store.write_hash(store, date + inc, sha)
+    path_meta = os.path.join(wd, meta_store.FILE_NAME) if path_pdf else None
+    _record(conn, date + inc, 200, path_pdf, path_meta, sha)
+
+
+async def _scrape_speech(
+    fetcher,
+    wd,
+    url,
+    speech_id,
+    downloads,
+    conn,
+    store,
+    max_age=None,
+):
+    date, inc = speech_id[:6], speech_id[6:]
+    try:
+        status, content = await fetcher.get(url + speech_id + bis.END_HTM, max_age)
+    except Exception:
+        return None
+
+    if status == 200:
+        try:
+            meta_name, inst, meta = bis.parse_speech_page(content)
+        except Exception:
+            _record(conn, speech_id, status)
+            return status
+        meta_store.write_speech(
+            store,
+            speech_id,
+            meta_name,
+            inst,
+            meta,
+            url + speech_id + bis.END_HTM,
+        )
+        downloads.append(
+            asyncio.create_task(
+                _download_pdf(fetcher, wd, url, date, inc, conn, store),
+            ),
+        )
+        return status
+
+    _record(conn, speech_id, status)
+    return status
+
+
+async def _scrape_date(
+    fetcher,
+    wd,
+    url,
+    date,
+    downloads,
+    conn,
+    store,
+    known,
+    probe,
+    max_age=None,
+):
+    if probe == "get":
+        # Letters are probed in order, since the first 404 ends the speeches of that date
+        for inc in string.ascii_lowercase:
+
+            # Check if speech was already scraped
+            if date + inc in known:
+                continue
+
+            status = await _scrape_speech(
+                fetcher,
+                wd,
+                url,
+                date + inc,
+                downloads,
+                conn,
+                store,
+                max_age,
+            )
+
+            # Break inner loop if no more speeches for that day
+            if status == 404:
+                break
+        return
+
+    # Find the number of speeches with HEAD requests and download only the hits
+    async def exists(inc):
+        if date + inc in known:
+            return True
+        try:
+            return await fetcher.head(url + date + inc + bis.END_HTM, max_age) == 200
+        except Exception:
+            return False
+
+    n = await probing.count_letters_async(exists, gallop=probe == "gallop")
+    fetcher.stats["hits"] += n
+    for inc in probing.LETTERS[:n]:
+        if date + inc not in known:
+            await _scrape_speech(
+                fetcher,
+                wd,
+                url,
+                date + inc,
+                downloads,
+                conn,
+                store,
+                max_age,
+            )
+
+
+async def _report(fetcher, every):
+    while True:
+        await asyncio.sleep(every)
+        for host, counters in fetcher.snapshot().items():
+            print(
+                f"{host}: {counters['req_per_s']:.1f} req/s, "
+                f"error rate {counters['error_rate']:.1%}, "
+                f"{counters['in_flight']} in flight (limit {counters['limit']})",
+            )
+
+
+async def _scrape(
+    wd,
+    url,
+    small,
+    max_concurrency,
+    rate_limit,
+    index_path,
+    since_last,
+    cache,
+    speech_ids,
+    probe,
+    report_every,
+):
+    date_list = lists.date_list(small)
+
+    # Open crawl index to skip the speeches that were already scraped
+    conn = None
+    known = set()
+    recent = set()
+    if index_path is not None:
+        conn = crawl_index.open_index(index_path)
+        known = crawl_index.known_ids(conn)
+        date_list = crawl_index.dates_to_probe(date_list, conn, since_last)
+
+        # Cached misses of the latest dates are requested again
+        recent = crawl_index.recent_dates(date_list, conn)
+
+    store = meta_store.open_store(wd)
+    fetcher = Fetcher(max_concurrency, rate_limit, cache)
+    downloads = []
+    reporter = None
+    if report_every:
+        reporter = asyncio.create_task(_report(fetcher, report_every))
+    try:
+        # Download the discovered speeches only (all that are not known yet, also of
+        # dates before the high-water mark), otherwise probe all dates
+        if speech_ids is not None:
+            jobs = [
+                _scrape_speech(
+                    fetcher,
+                    wd,
+                    url,
+                    speech_id,
+                    downloads,
+                    conn,
+                    store,
+                    0,
+                )
+                for speech_id in speech_ids
+                if speech_id not in known
+            ]
+        else:
+            jobs = [
+                _scrape_date(
+                    fetcher,
+                    wd,
+                    url,
+                    date,
+                    downloads,
+                    conn,
+                    store,
+                    known,
+                    probe,
+                    0 if date in recent else None,
+                )
+                for date in date_list
+            ]
+        await asyncio.gather(*jobs)
+        await asyncio.gather(*downloads)
+
+        # Add the retries and failures counted by the rate controllers
+        for counters in fetcher.snapshot().values():
+            for key in ["retries", "throttled", "timeouts", "breaker_opened"]:
+                fetcher.stats[key] += counters.get(key, 0)
+        return fetcher.stats
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        await fetcher.close()
+        store.close()
+        if conn is not None:
+            conn.close()
+
+
+def bis_scraper_async(
+    wd,
+    url=bis.URL,
+    small=1,
+    max_concurrency=16,
+    rate_limit=8,
+    index_path=None,
+    since_last=False,
+    cache=None,
+    speech_ids=None,
+    probe="get",
+    report_every=None,
+):
+    """Scrapes all available speeches on the BIS homepage concurrently.
+
+    Dates are scraped in parallel, the letters of one date in order. The number of
+    requests in flight adapts to the latency and throttling of the server (see
+    rate_control.AdaptiveLimiter). The output is the same as for bis_scraper:
+    the meta data store (meta_data.sqlite) and one pdf per speech in wd.
+
+    Args:
+        wd: string
+        url: prefix of the speech urls (can point to a local copy of the BIS review)
+        small: set equal to 1 to only retain the first day of the month
+        max_concurrency: maximum number of requests in flight per host
+        rate_limit: maximum number of requests per second and host
+        index_path: path of the crawl index; speeches in the index are not scraped again
+        since_last: only probe dates from the latest speech in the index onwards
+            (speech_ids are not cut, so speeches posted late for older dates are
+            still downloaded)
+        cache: http_cache.HttpCache the responses are served from and stored in
+        speech_ids: list of speech ids (e.g. from discovery.discover_speech_ids) that
+            are downloaded instead of probing all dates and letters; they are
+            requested even if their miss is cached, since they are listed by the server
+        probe: how the letters of a date are probed; "get" downloads the pages of a..z
+            until the first 404, "head" checks them with HEAD requests first and
+            "gallop" uses HEAD requests and galloping search over the letters
+        report_every: seconds between printouts of req/s, error rate and requests in
+            flight (None for no printouts)
+
+    Returns:
+        collections.Counter with the number of requests, retries, failures and
+        downloaded bytes
+
+    """
+    return asyncio.run(
+        _scrape(
+            wd,
+            url,
+            small,
+            max_concurrency,
+            rate_limit,
+            index_path,
+            since_last,
+            cache,
+            speech_ids,
+            probe,
+            report_every,
+        ),
+    )
@@ -0,0 +1,117 @@
+# Import packages
+import difflib
+import glob
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Import scripts
+import epp_final_project.scrape_bis.pdf_extract as pdf_extract
+
+### Benchmark of the text extraction backends
+#
+# Usage: python -m epp_final_project.scrape_bis.benchmark_backends folder [n]
+#
+# Runs every backend over the first n pdfs in folder (e.g. bld/data/raw/pdf) and
+# prints pages/sec, peak RSS and the difference of the text to textract.
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # Backends that call pdftotext run in child processes; ru_maxrss is in KiB
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024
+
+
+def _run_backend(backend, paths):
+    texts = []
+    start = time.perf_counter()
+    for path in paths:
+        try:
+            texts.append(pdf_extract.extract_text(path, backend))
+        except Exception:
+            texts.append(None)
+    seconds = time.perf_counter() - start
+    return texts, seconds, _peak_rss_mb()
+
+
+def text_diff(text, reference):
+    """Returns the share of words that differ between text and reference (0 to 1)."""
+    matcher = difflib.SequenceMatcher(None, text.split(), reference.split())
+    return 1 - matcher.ratio()
+
+
+def benchmark(paths, backends=None, reference="textract"):
+    """Runs the text extraction backends over a set of pdfs.
+
+    Each backend runs in a fresh process, so that the peak RSS of one backend does
+    not include the memory of the others.
+
+    Args:
+        paths: list of paths of pdfs
+        backends: list of names in pdf_extract.BACKENDS (None for all)
+        reference: backend the texts are compared with
+
+    Returns:
+        dataframe with one row per backend: files, failed, pages, seconds,
+        pages_per_s, peak_rss_mb and text_diff (mean share of words that differ from
+        the reference)
+
+    """
+    # Imported here, so that the spawned processes (which import this module) do
+    # not count the memory of pandas in their peak RSS
+    import pandas as pd
+
+    if backends is None:
+        backends = list(pdf_extract.BACKENDS)
+    backends = [reference] + [b for b in backends if b != reference]
+
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for backend in backends:
+        with ProcessPoolExecutor(1, mp_context=context) as pool:
+            results[backend] = pool.submit(_run_backend, backend, paths).result()
+
+    # Pages are separated by form feeds in the texts of all backends; the pages of
+    # each pdf are counted in the first text that is available
+    reference_texts = results[reference][0]
+    pages = 0
+    for texts in zip(*[texts for texts, _, _ in results.values()]):
+        text = next((text for text in texts if text is not None), "")
+        pages += max(text.count("\f"), 1)
+
+    rows = []
+    for backend, (texts, seconds, peak_rss_mb) in results.items():
+        diffs = [
+            text_diff(text, ref)
+            for text, ref in zip(texts, reference_texts)
+            if text is not None and ref is not None
+        ]
+        failed = sum(text is None for text in texts)
+        rows.append(
+            {
+                "backend": backend,
+                "files": len(paths),
+                "failed": failed,
+                "pages": pages,
+                "seconds": seconds,
+                "pages_per_s": pages / seconds if failed < len(paths) else None,
+                "peak_rss_mb": peak_rss_mb,
+                "text_diff": sum(diffs) / len(diffs) if diffs else None,
+            },
+        )
+
+    return pd.DataFrame(rows).set_index("backend")
+
+
+if __name__ == "__main__":
+    folder = sys.argv[1]
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    paths = sorted(glob.glob(os.path.join(folder, "*.pdf")))[:n]
+    print(benchmark(paths).to_string(float_format="{:.3f}".format))
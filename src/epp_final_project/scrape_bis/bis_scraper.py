@@ -1,248 +1,513 @@
 # Import packages
-import datetime as dt
 import glob
 import os
+import shutil
 import string
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 # Import lists
+import epp_final_project.scrape_bis.crawl_index as crawl_index
+import epp_final_project.scrape_bis.http_cache as http_cache
+import epp_final_project.scrape_bis.institutions as institutions
 import epp_final_project.scrape_bis.lists as lists
-
-import pandas as pd
-import requests
-import textract
-from bs4 import BeautifulSoup as bs
+import epp_final_project.scrape_bis.meta_store as meta_store
+import epp_final_project.scrape_bis.pdf_extract as pdf_extract
+import epp_final_project.scrape_bis.pdf_store as pdf_store
+import epp_final_project.scrape_bis.probing as probing
+import epp_final_project.scrape_bis.speech_archive as speech_archive
 
 ### Function for scraping the data
 
+# Define url from where to get text data
+URL = "https://www.bis.org/review/r"
+END_PDF = ".pdf"
+END_HTM = ".htm"
+
+
+def parse_speech_page(content):
+    """Extracts speaker, institution and meta data from a speech page.
+
+    Args:
+        content: bytes or string with the html of r{date}{letter}.htm
+
+    Returns:
+        meta_name: name of the speaker ("NA" if not available)
+        inst: normalized institution (lower case)
+        meta: meta information of the speech
+
+    Raises:
+        ValueError if no known institution is mentioned in the meta information
+
+    """
+    from bs4 import BeautifulSoup as bs
+
+    # Creating a Beautiful Soup object with appropriate parser.
+    soup = bs(content, "html.parser")
+
+    # Retrieve author data
+    try:
+        meta_name = soup.find_all(
+            "a",
+            {"class": "authorlnk dashed"},
+        )
+        meta_name = meta_name[0].text
+    except:
+        meta_name = "NA"
+
+    # Retrieve meta data
+    extratitle = soup.find(id="extratitle-div")
+
+    # Create a string with meta data
+    meta = extratitle.text
+    meta = meta.strip()  # remove white space
+
+    # Match institution with meta data: if multiple institutions are in the extra
+    # title, choose the one that comes first; names that are written differently
+    # (or wrong) on the BIS website are mapped to one canonical name (lower case)
+    inst, _, _ = institutions.match_institution(meta)
+    if inst is None:
+        raise ValueError("No institution found in: " + meta)
+
+    return meta_name, inst, meta
+
+
+def scrape_speech(
+    wd,
+    url,
+    speech_id,
+    cache=None,
+    conn=None,
+    stats=None,
+    store=None,
+    max_age=None,
+):
+    """Downloads meta data and pdf of one speech.
+
+    Args:
+        wd: string
+        url: prefix of the speech urls
+        speech_id: date in format 210101 plus letter, e.g. 210101a
+        cache: http_cache.HttpCache the responses are served from and stored in
+        conn: connection to the crawl index the probe is recorded in
+        stats: collections.Counter that counts requests and downloaded bytes
+        store: connection to the meta data store (meta_store.open_store(wd) if None)
+        max_age: seconds after which the cached page is requested again (None for
+            the max_age and ttl_404 of the cache)
+
+    Returns:
+        http status code of the speech page
+
+    """
+    status, content = http_cache.cached_get(
+        url + speech_id + END_HTM,
+        cache,
+        stats=stats,
+        max_age=max_age,
+    )
+    path_pdf = None
+    sha = None
+
+    if status == 200:
+        try:
+            meta_name, inst, meta = parse_speech_page(content)
+            if store is None:
+                store = meta_store.open_store(wd)
+            meta_store.write_speech(
+                store,
+                speech_id,
+                meta_name,
+                inst,
+                meta,
+                url + speech_id + END_HTM,
+            )
+
+            # Now stream the pdf to the content-addressed store
+            path_pdf, sha = pdf_store.download_pdf(
+                url + speech_id + END_PDF,
+                wd,
+                speech_id,
+                cache,
+                stats,
+            )
+            if sha is not None:
+                meta_store.write_hash(store, speech_id, sha)
+
+        except:
+            pass
 
-def bis_scraper(wd):
+    if conn is not None:
+        crawl_index.record_probe(
+            conn,
+            speech_id,
+            status,
+            path_pdf=path_pdf,
+            path_meta=os.path.join(wd, meta_store.FILE_NAME) if path_pdf else None,
+            sha256=sha,
+        )
+
+    return status
+
+
+def bis_scraper(
+    wd,
+    url=URL,
+    small=1,
+    index_path=None,
+    since_last=False,
+    cache=None,
+    speech_ids=None,
+    probe="get",
+):
     """Scrapes all available speeches on the BIS homepage.
 
     Args:
         wd: string
-        institutions: list of strings
-        date_list: list of dates in format 210101
+        url: prefix of the speech urls (can point to a local copy of the BIS review)
+        small: set equal to 1 to only retain the first day of the month
+        index_path: path of the crawl index; speeches in the index are not scraped again
+        since_last: only probe dates from the latest speech in the index onwards
+            (speech_ids are not cut, so speeches posted late for older dates are
+            still downloaded)
+        cache: http_cache.HttpCache the responses are served from and stored in
+        speech_ids: list of speech ids (e.g. from discovery.discover_speech_ids) that
+            are downloaded instead of probing all dates and letters; they are
+            requested even if their miss is cached, since they are listed by the server
+        probe: how the letters of a date are probed; "get" downloads the pages of a..z
+            until the first 404, "head" checks them with HEAD requests first and
+            "gallop" uses HEAD requests and galloping search over the letters
 
     Output:
-        File with Metadata
+        Store with the meta data (meta_data.sqlite)
         pdf's with speeches
 
-    """
+    Returns:
+        collections.Counter with the number of requests and downloaded bytes
 
-    # Create list of institutions.
-    institutions = lists.institutions
+    """
 
     # Create datelist: set argument equal to 1 to only retain the first day of the month
-    date_list = lists.date_list(1)
+    date_list = lists.date_list(small)
 
     # Create list of the alphabet
     letters = list(string.ascii_lowercase)
 
-    # Define url from where to get text data
-    url = "https://www.bis.org/review/r"
-    end_pdf = ".pdf"
-    end_htm = ".htm"
-
-    for date in date_list:
-        for inc in letters:
-
-            response = requests.get(url + date + inc + end_htm)
-
-            # Check if file already exists
-            file_path_check = os.path.join(wd, date + inc + ".pdf.txt")
-
-            if not os.path.exists(file_path_check):
-
-                if response.status_code == 200:
-                    try:
-                        # Creating a Beautiful Soup object with appropriate parser.
-                        soup = bs(response.content, "html.parser")
-
-                        # Retrieve author data
-                        try:
-                            meta_name = soup.find_all(
-                                "a",
-                                {"class": "authorlnk dashed"},
-                            )
-                            meta_name = meta_name[0].text
-                        except:
-                            meta_name = "NA"
-
-                        # Retrieve meta data
-                        extratitle = soup.find(id="extratitle-div")
-
-                        # Create a string with meta data
-                        meta = extratitle.text
-                        meta = meta.strip()  # remove white space
-
-                        # Match institution with meta data
-                        inst = []
-                        for item in institutions:
-                            if item.lower() in meta.lower():  # case insensitive
-                                inst.append(item.lower())  # append all matching inst.
-
-                        # If one institution was in the list proceed further
-                        if len(inst) == 1:
-                            inst = inst[0]
-
-                        # If multiple institutions were in the extra title, choose
-                        # the one that comes first in the meta information
-                        elif len(inst) > 1:
-                            index_list = []
-                            for i in inst:
-                                index_list.append(meta.lower().find(i))
-                            min_value = min(index_list)
-                            inst = inst[index_list.index(min_value)]
-
-                        # Correct some institution names, because they are written
-                        # wrong on the BIS website for some (all lower case here)
-                        # us
-                        if inst in lists.inst_us:
-                            inst = lists.inst_us[0]
-                        # norway
-                        if inst == "norges bank":
-                            inst = "central bank of norway"
-                        # france
-                        if inst == "banque de france":
-                            inst = "bank of france"
-                        # sweden
-                        if inst in lists.inst_swe:
-                            inst = "sveriges riksbank"
-                        # netherlands
-                        if inst == "nederlandsche bank":
-                            inst = "netherlands bank"
-                        # austria
-                        if inst in lists.inst_austria:
-                            inst = "central bank of the republic of austria"
-                        # south africa
-                        if inst == "bank of south africa":
-                            inst = "south african reserve bank"
-                        # hong kong
-                        if inst == "hong kong monetary":
-                            inst = "hong kong monetary authority"
-                        # india
-                        if inst == "bank of india":
-                            inst = "reserve bank of india"
-                        # macedonia
-                        if (
-                            inst == "national bank of the republic of macedonia"
-                            or inst
-                            == "national bank of the republic of north macedonia"
-                        ):
-                            inst = "national bank of north macedonia"
-                        # european cental bank
-                        if inst == "ecb":
-                            inst = "european central bank"
-                        # ireland
-                        if inst == "authority of ireland":
-                            inst = "central bank of ireland"
-                        # turkey
-                        if inst == "bank of turkey":
-                            inst = "central bank of the republic of turkey"
-                        # china
-                        if inst == "bank of china":
-                            inst = "people's bank of china"
-                        # australia
-                        if (
-                            inst == "australian reserve bank"
-                            or inst == "bank of australia"
-                        ):
-                            inst = "reserve bank of australia"
-
-                        # Create string for outputting meta data
-                        file_meta = os.path.join(wd, "meta_data.txt")
-
-                        # Create Date Time format
-                        date_hr = dt.datetime.strptime(
-                            date,
-                            "%y%m%d",
-                        )  # datetime object
-                        date_hr = dt.datetime.strftime(
-                            date_hr,
-                            "%Y-%m-%d",
-                        )  # convert to "%Y-%m-%d"
-
-                        # use "a" instead of "w" to append
-                        with open(file_meta, "a", encoding="utf-8") as f:
-                            f.write(
-                                date
-                                + inc
-                                + ", "
-                                + date_hr
-                                + ", "
-                                + meta_name
-                                + ", "
-                                + inst
-                                + ": "
-                                + meta
-                                + "\n",
-                            )
-
-                        # Now download and save pdf
-                        response_pdf = requests.get(url + date + inc + end_pdf)
-
-                        file_speech = os.path.join(wd, date + inc + ".pdf")
-
-                        with open(file_speech, "wb") as f:
-                            f.write(response_pdf.content)
-
-                    except:
-                        pass
+    # Open crawl index to skip the speeches that were already scraped
+    conn = None
+    known = set()
+    recent = set()
+    if index_path is not None:
+        conn = crawl_index.open_index(index_path)
+        known = crawl_index.known_ids(conn)
+        date_list = crawl_index.dates_to_probe(date_list, conn, since_last)
+
+        # Cached misses of the latest dates are requested again
+        recent = crawl_index.recent_dates(date_list, conn)
+
+    def max_age(date):
+        return 0 if date in recent else None
+
+    stats = Counter()
+    store = meta_store.open_store(wd)
+
+    # Download the discovered speeches only (all that are not known yet, also of
+    # dates before the high-water mark)
+    if speech_ids is not None:
+        for speech_id in speech_ids:
+            if speech_id not in known:
+                scrape_speech(
+                    wd,
+                    url,
+                    speech_id,
+                    cache,
+                    conn,
+                    stats,
+                    store,
+                    0,
+                )
+
+    # Otherwise probe all letters of all dates
+    elif probe == "get":
+        for date in date_list:
+            for inc in letters:
+
+                # Check if speech was already scraped
+                if date + inc in known:
+                    continue
+
+                status = scrape_speech(
+                    wd,
+                    url,
+                    date + inc,
+                    cache,
+                    conn,
+                    stats,
+                    store,
+                    max_age(date),
+                )
 
                 # Break inner loop if no more speeches for that day
-                elif response.status_code == 404:
+                if status == 404:
                     break
 
+    # Or find the number of speeches with HEAD requests and download only the hits
+    else:
+        for date in date_list:
+
+            def exists(inc, date=date):
+                if date + inc in known:
+                    return True
+                status = http_cache.cached_head(
+                    url + date + inc + END_HTM,
+                    cache,
+                    stats=stats,
+                    max_age=max_age(date),
+                )
+                return status == 200
+
+            n = probing.count_letters(exists, gallop=probe == "gallop")
+            stats["hits"] += n
+            for inc in letters[:n]:
+                if date + inc not in known:
+                    scrape_speech(
+                        wd,
+                        url,
+                        date + inc,
+                        cache,
+                        conn,
+                        stats,
+                        store,
+                        max_age(date),
+                    )
+
+    store.close()
+    if conn is not None:
+        conn.close()
+
+    return stats
+
 
 ### Function for transforming the data in txt files
 
 
-def pdf_to_txt(wd, out):
-    """Transfers txt files to pdfs, deletes pdf.
+def pdf_to_txt(
+    wd,
+    out,
+    workers=None,
+    timeout=None,
+    backend="textract",
+    cache=None,
+    max_pages=None,
+    max_bytes=None,
+):
+    """Transfers pdfs to txt files.
+
+    The speeches and the hashes of their pdfs are read from the meta data store and
+    the pdfs from the content-addressed store (wd/objects/{sha256}.pdf). For each
+    speech the text of its pdf is looked up in the cache, so a pdf is extracted
+    again if it changed, if the backend (or its version or the caps) changed or if
+    its text was lost. Identical pdfs (e.g. reposted speeches) are extracted only
+    once. The texts are linked to out/{speech id}.pdf.txt and the number of pages
+    of each speech is stored in the meta data store.
+
+    The pdfs are extracted in parallel processes, which are killed (with the
+    processes they started) if the extraction of a pdf takes longer than timeout.
+    The text is streamed page by page to the txt file and can be capped for very
+    long documents. Speeches whose pdf cannot be extracted are listed in a summary.
 
     Args:
         wd: string where pdf's are stored
+        out: string where the txt files are written to
+        workers: number of worker processes (None for all cores)
+        timeout: seconds after which the extraction of one pdf is aborted (None for
+            no timeout)
+        backend: name of the text extraction backend (see pdf_extract.BACKENDS)
+        cache: text_cache.TextCache of the backend the texts are stored in (with the
+            same max_pages and max_bytes); without cache, only speeches without a
+            txt file are extracted
+        max_pages: number of pages after which the extraction of a pdf stops (None
+            for all)
+        max_bytes: bytes of text after which the extraction of a pdf stops (None for
+            all)
+
+    Returns:
+        dict with the error of each pdf that could not be extracted
 
     """
-    files = list(glob.glob(os.path.join(wd, "*.pdf")))
+    hashes = {}
+    without_pages = set()
+    if os.path.exists(os.path.join(wd, meta_store.FILE_NAME)):
+        hashes = meta_store.read_hashes(wd)
+        without_pages = meta_store.read_without_pages(wd)
+
+    # Folders scraped before the meta data store existed only have wd/{id}.pdf
+    for file in glob.glob(os.path.join(wd, "*" + END_PDF)):
+        speech_id = os.path.basename(file)[: -len(END_PDF)]
+        if speech_id not in hashes:
+            hashes[speech_id] = pdf_store.file_sha256(file)
+
+    # Group the speeches with identical pdfs by their hash
+    groups = {}
+    for speech_id, sha in sorted(hashes.items()):
+        groups.setdefault(sha, []).append(speech_id)
+
+    def path_out(speech_id):
+        return os.path.join(out, speech_id + END_PDF + ".txt")
+
+    # Path of the text of each group: in the cache or in the first txt file
+    paths_text = {}
+    for sha, group in groups.items():
+        if cache is not None:
+            paths_text[sha] = cache.path_text(sha)
+        else:
+            existing = [i for i in group if os.path.exists(path_out(i))]
+            paths_text[sha] = path_out((existing or group)[0])
+    missing = [sha for sha in groups if not os.path.exists(paths_text[sha])]
+
+    # The pdf of each group: the stored object or, for old folders, a speech's pdf
+    failures = {}
+    paths_pdf = {}
+    for sha in missing:
+        candidates = [os.path.join(wd, pdf_store.OBJECTS, sha + END_PDF)]
+        candidates += [os.path.join(wd, i + END_PDF) for i in groups[sha]]
+        paths_pdf[sha] = next((c for c in candidates if os.path.exists(c)), None)
+    for sha in [sha for sha in missing if paths_pdf[sha] is None]:
+        missing.remove(sha)
+        for speech_id in groups[sha]:
+            failures[speech_id + END_PDF] = "pdf not found"
+
+    # Extract text from the pdf of each group that is not cached
+    errors = pdf_extract.extract_pdfs(
+        [paths_pdf[sha] for sha in missing],
+        [paths_text[sha] for sha in missing],
+        workers,
+        timeout,
+        backend,
+        max_pages,
+        max_bytes,
+    )
+    errors = dict(zip(missing, errors))
+
+    # Link the text to the txt file of each speech that does not have it yet and
+    # count the pages of the linked texts and of the speeches without a page count
+    pages = {}
+    updated = 0
+    for sha, group in groups.items():
+        if errors.get(sha) is not None:
+            for speech_id in group:
+                failures[speech_id + END_PDF] = errors[sha]
+            continue
+        if not os.path.exists(paths_text[sha]):
+            continue
+
+        n = None
+        for speech_id in group:
+            path = path_out(speech_id)
+            if not (os.path.exists(path) and os.path.samefile(path, paths_text[sha])):
+                http_cache.link_or_copy(paths_text[sha], path)
+                updated += 1
+            elif speech_id not in without_pages:
+                continue
+            if n is None:
+                n = pdf_extract.count_pages(paths_text[sha])
+            pages[speech_id] = n
+
+    # Record the page counts (folders scraped before the meta data store existed
+    # have no store)
+    if pages and os.path.exists(os.path.join(wd, meta_store.FILE_NAME)):
+        store = meta_store.open_store(wd)
+        meta_store.write_pages(store, pages)
+        store.close()
+
+    # Summary
+    print(
+        f"pdf_to_txt: {len(hashes) - len(failures)} of {len(hashes)} speeches have "
+        f"a text ({updated} updated, {sum(e is None for e in errors.values())} pdfs "
+        f"extracted, {len(groups) - len(paths_pdf)} cached, "
+        f"{len(hashes) - len(groups)} duplicates), {len(failures)} failed",
+    )
+    for file_name, error in failures.items():
+        print(f"  {file_name}: {error}")
 
-    for file in files:
+    return failures
 
-        try:
-            # Extract text from pdf
-            text = textract.process(file)  # type bytes
-            text = text.decode("utf-8")  # decode to type str
 
-            # Create new file name
-            file_name = os.path.basename(file)
+### Function that combines everything into one dataset
 
-            # Save list of strings to file
-            path_file_out = os.path.join(out, file_name + ".txt")
 
-            with open(path_file_out, "w") as f:
-                f.write(text)
+def construct_dataset(wd_text, wd_meta, workers=None):
+    """Constructs dataset containing all speeches from meta_data and individual
+    textfiles.
 
-            f.close()
-            os.remove(file)
+    The meta data is read from the store (meta_data.sqlite); folders scraped before
+    the store existed are read from meta_data.txt. The texts are read in parallel
+    threads from the speech archive (see speech_archive.py) or, if wd_text is not an
+    archive, from the individual txt files. Speeches without text and texts without
+    meta data are reported.
 
-        except Exception:
-            pass
+    Args:
+        wd_text: string where the speech archive (or the txt files) is stored
+        wd_meta: string where the meta data is stored
+        workers: number of threads that read the texts (None for the default of
+            ThreadPoolExecutor)
 
+    Output: combined dataset
 
-### Function that combines everything into one dataset
+    """
+    import pandas as pd
+
+    if os.path.exists(os.path.join(wd_meta, meta_store.FILE_NAME)):
+        df = meta_store.read_meta(wd_meta)
+    else:
+        df = _read_meta_txt(wd_meta)
+
+    if os.path.exists(os.path.join(wd_text, speech_archive.INDEX)):
+        archive = speech_archive.SpeechArchive(wd_text)
+        texts = archive.read_all(workers)
+        archive.close()
+    else:
+        texts = _read_txt_files(wd_text, workers)
+
+    df["speech"] = df["filename"].map(texts).fillna("")
+
+    # Year of the speech (the datasets are stored by year)
+    df["year"] = pd.to_datetime(df["date"]).dt.year
+
+    # Report speeches without text and texts without meta data
+    missing = sorted(set(df["filename"]) - set(texts))
+    orphans = sorted(set(texts) - set(df["filename"]))
+    print(
+        f"construct_dataset: {len(df) - len(missing)} of {len(df)} speeches with "
+        f"text, {len(missing)} missing, {len(orphans)} texts without meta data",
+    )
+    for name, ids in [("missing", missing), ("without meta data", orphans)]:
+        if ids:
+            more = ", ..." if len(ids) > 20 else ""
+            print(f"  {name}: {', '.join(ids[:20])}{more}")
+
+    return df
 
 
-def construct_dataset(wd_text, wd_meta):
-    """Constructs dataset containing all speeches from meta_data and individual
-    textfiles.
+def _read_txt_files(wd_text, workers):
+    files = glob.glob(os.path.join(wd_text, "*.pdf.txt"))
 
-    Args: working directory with scraped data
+    def read(file):
+        with open(file, encoding="utf-8") as f:
+            return f.read()
 
-    Output: combined dataset
+    with ThreadPoolExecutor(workers) as pool:
+        texts = list(pool.map(read, files))
+    ids = [os.path.basename(file)[: -len(".pdf.txt")] for file in files]
+    return dict(zip(ids, texts))
+
+
+def _read_meta_txt(wd_meta):
+    import pandas as pd
 
-    """
     # Load file
-    with open(os.path.join(wd_meta, "meta_data.txt").replace("\\", "/"), encoding="utf-8") as f:
+    with open(
+        os.path.join(wd_meta, "meta_data.txt").replace("\\", "/"), encoding="utf-8"
+    ) as f:
         df = f.readlines()
     df = pd.DataFrame(df, columns=["column_name"])
 
@@ -259,16 +524,4 @@ def construct_dataset(wd_text, wd_meta):
     # Drop some variables
     df = df.drop(["column_name", "residual"], axis=1)
 
-    # initialize empty speech string
-    df["speech"] = ""
-
-    # loop over filenames and load corresponding text file
-    for i, filename in enumerate(df["filename"]):
-        try:
-            with open(os.path.join(wd_text, filename + ".pdf.txt")) as file:
-                text = file.read()
-                df.at[i, "speech"] = text
-        except:
-            pass
-
     return df
@@ -0,0 +1,112 @@
+# Import packages
+import datetime as dt
+import sqlite3
+
+### Persistent ledger of all probed speech ids
+
+
+def open_index(path):
+    """Opens (and if necessary creates) the crawl index.
+
+    Args:
+        path: path of the sqlite file, e.g. BLD / "data" / "raw" / "crawl_index.sqlite"
+
+    Returns:
+        sqlite3 connection
+
+    """
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS probes (
+            speech_id TEXT PRIMARY KEY,
+            date TEXT NOT NULL,
+            status INTEGER NOT NULL,
+            fetched_at TEXT NOT NULL,
+            path_pdf TEXT,
+            path_meta TEXT,
+            sha256 TEXT
+        )
+        """,
+    )
+
+    # Add the hash column to indexes created before it existed
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(probes)")]
+    if "sha256" not in columns:
+        conn.execute("ALTER TABLE probes ADD COLUMN sha256 TEXT")
+    conn.commit()
+    return conn
+
+
+def record_probe(conn, speech_id, status, path_pdf=None, path_meta=None, sha256=None):
+    """Stores the result of one probe, overwriting earlier probes of the same id.
+
+    Args:
+        conn: connection returned by open_index
+        speech_id: date in format 210101 plus letter, e.g. 210101a
+        status: http status code of r{speech_id}.htm
+        path_pdf: path of the downloaded pdf
+        path_meta: path of the file the meta data was written to
+        sha256: SHA-256 of the downloaded pdf
+
+    """
+    date = dt.datetime.strptime(speech_id[:6], "%y%m%d").strftime("%Y-%m-%d")
+    fetched_at = dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds")
+    conn.execute(
+        "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (speech_id, date, status, fetched_at, path_pdf, path_meta, sha256),
+    )
+    conn.commit()
+
+
+def known_ids(conn):
+    """Returns the set of speech ids that were already scraped successfully."""
+    rows = conn.execute(
+        "SELECT speech_id FROM probes WHERE status = 200 AND path_pdf IS NOT NULL",
+    )
+    return {row[0] for row in rows}
+
+
+def high_water_mark(conn):
+    """Returns the date of the latest scraped speech (format 210101) or None."""
+    (date,) = conn.execute(
+        "SELECT MAX(date) FROM probes WHERE status = 200 AND path_pdf IS NOT NULL",
+    ).fetchone()
+    if date is None:
+        return None
+    return dt.datetime.strptime(date, "%Y-%m-%d").strftime("%y%m%d")
+
+
+def dates_to_probe(date_list, conn, since_last):
+    """Drops the dates before the high-water mark of the index.
+
+    The date of the high-water mark itself is kept, since speeches can be added to
+    it later on; the letters that are already known are skipped by the scrapers.
+
+    Args:
+        date_list: list of dates in format 210101
+        conn: connection returned by open_index
+        since_last: if False, date_list is returned unchanged
+
+    """
+    last = high_water_mark(conn) if since_last else None
+    if last is None:
+        return date_list
+    last = dt.datetime.strptime(last, "%y%m%d")
+    return [d for d in date_list if dt.datetime.strptime(d, "%y%m%d") >= last]
+
+
+def recent_dates(date_list, conn):
+    """Returns the set of dates at or after the high-water mark of the index.
+
+    Speeches can still be added to these dates, so the scrapers request their misses
+    again instead of serving them from the negative cache.
+
+    Args:
+        date_list: list of dates in format 210101
+        conn: connection returned by open_index (None for no dates)
+
+    """
+    if conn is None or high_water_mark(conn) is None:
+        return set()
+    return set(dates_to_probe(date_list, conn, True))
@@ -0,0 +1,73 @@
+# Import packages
+import datetime as dt
+import re
+from urllib.parse import urljoin
+
+# Import scripts
+import epp_final_project.scrape_bis.http_cache as http_cache
+
+### Discover speech ids from listing pages instead of probing all dates and letters
+
+# Pages listing the central bankers' speeches (sitemaps, html listings or rss feeds)
+INDEX_URLS = [
+    "https://www.bis.org/sitemap.xml",
+    "https://www.bis.org/doclist/cbspeeches.rss",
+]
+
+# Links to speeches, e.g. /review/r210101a.htm or /review/r210101a.pdf
+SPEECH_LINK = re.compile(r"review/r(\d{6}[a-z])\.(?:htm|pdf)")
+
+# Nested sitemaps of a sitemap index
+SITEMAP_LINK = re.compile(r"<sitemap>\s*<loc>\s*([^<\s]+)\s*</loc>")
+
+
+def extract_speech_ids(content):
+    """Returns the set of speech ids linked on a listing page.
+
+    Args:
+        content: bytes or string of a sitemap, html listing or rss feed
+
+    """
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", errors="replace")
+    return set(SPEECH_LINK.findall(content))
+
+
+def discover_speech_ids(index_urls=INDEX_URLS, cache=None):
+    """Collects the ids of all speeches linked on the listing pages.
+
+    Nested sitemaps of sitemap indexes are followed. The listing pages change with
+    every new speech, so they are revalidated on every call (a conditional GET,
+    which is answered with 304 if the page has not changed) instead of being served
+    from the cache until its max_age has passed.
+
+    Args:
+        index_urls: list of urls of listing pages
+        cache: http_cache.HttpCache the responses are served from and stored in
+
+    Returns:
+        list of speech ids (e.g. 210101a), sorted by date and letter
+
+    """
+    speech_ids = set()
+    queue = list(index_urls)
+    visited = set()
+
+    while queue:
+        index_url = queue.pop()
+        if index_url in visited:
+            continue
+        visited.add(index_url)
+
+        status, content = http_cache.cached_get(index_url, cache, max_age=0)
+        if status != 200:
+            continue
+
+        text = content.decode("utf-8", errors="replace")
+        speech_ids |= extract_speech_ids(text)
+        queue += [urljoin(index_url, link) for link in SITEMAP_LINK.findall(text)]
+
+    return sorted(
+        speech_ids,
+        key=lambda i: (dt.datetime.strptime(i[:6], "%y%m%d"), i[6:]),
+    )
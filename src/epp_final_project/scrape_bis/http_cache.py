@@ -0,0 +1,306 @@
+# Import packages
+import hashlib
+import json
+import os
+import shutil
+import time
+
+### On-disk cache for the responses of bis.org
+
+
+class HttpCache:
+    """Stores http responses on disk, keyed by url.
+
+    Successful responses are revalidated with ETag/If-Modified-Since once they are
+    older than max_age, 404s are not requested again before ttl_404 has passed. If
+    the size of the cache exceeds max_size, the least recently used entries are
+    evicted.
+
+    Args:
+        path: directory of the cache
+        max_age: seconds after which a 200 response is revalidated
+        ttl_404: seconds during which a 404 response is served from the cache
+        max_size: maximum size of the cache in bytes
+        offline: only serve responses from the cache, never touch the network
+
+    """
+
+    # Status codes that are stored in the cache
+    cacheable = (200, 404)
+
+    # Status code returned for urls that are not cached in offline mode
+    status_miss = 504
+
+    def __init__(
+        self,
+        path,
+        max_age=30 * 24 * 3600,
+        ttl_404=7 * 24 * 3600,
+        max_size=5 * 1024**3,
+        offline=False,
+    ):
+        self.path = path
+        self.max_age = max_age
+        self.ttl_404 = ttl_404
+        self.max_size = max_size
+        self.offline = offline
+        os.makedirs(path, exist_ok=True)
+        self.size = sum(size for _, _, size in self._entries())
+
+    def _key(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, key[:2], key)
+
+    def _entries(self):
+        """Yields (last access, key path, size) of all cached responses."""
+        for sub in os.scandir(self.path):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if entry.name.endswith(".json"):
+                    key = entry.path[: -len(".json")]
+                    size = entry.stat().st_size
+                    if os.path.exists(key + ".body"):
+                        size += os.path.getsize(key + ".body")
+                    yield entry.stat().st_mtime, key, size
+
+    def _size(self, key):
+        """Returns the size of the entry stored under key (0 if there is none)."""
+        size = 0
+        for ending in [".json", ".body"]:
+            if os.path.exists(key + ending):
+                size += os.path.getsize(key + ending)
+        return size
+
+    def _write_meta(self, key, entry):
+        """Writes the metadata of an entry via a temporary file."""
+        with open(key + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(key + ".json.tmp", key + ".json")
+
+    def lookup(self, url, load=True):
+        """Returns the cached entry of url (a dict) or None.
+
+        Args:
+            url: string
+            load: read the body into entry["content"]; otherwise only the path of the
+                body is returned in entry["path"], e.g. to stream large pdfs
+
+        """
+        key = self._key(url)
+        try:
+            with open(key + ".json", encoding="utf-8") as f:
+                entry = json.load(f)
+            entry["path"] = key + ".body"
+            if load:
+                with open(key + ".body", "rb") as f:
+                    entry["content"] = f.read()
+            elif not os.path.exists(key + ".body"):
+                return None
+        except (OSError, ValueError):
+            return None
+
+        # Mark entry as recently used
+        os.utime(key + ".json")
+        return entry
+
+    def is_fresh(self, entry, max_age=None):
+        """Checks whether entry can be served without contacting the server.
+
+        Args:
+            entry: dict returned by lookup
+            max_age: seconds after which the response is revalidated in any case
+                (None for the max_age and ttl_404 of the cache, 0 to always
+                revalidate)
+
+        """
+        age = time.time() - entry["fetched_at"]
+        if max_age is not None and age >= max_age:
+            return False
+        if entry["status"] == 404:
+            return age < self.ttl_404
+        return age < self.max_age
+
+    def validators(self, entry):
+        """Returns the headers of a conditional request for entry."""
+        headers = {}
+        if entry is None or entry["status"] != 200:
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, status, headers, content):
+        """Writes a response to the cache (only 200s and 404s are stored)."""
+        if status not in self.cacheable:
+            return
+        key = self._key(url)
+        os.makedirs(os.path.dirname(key), exist_ok=True)
+        entry = {
+            "url": url,
+            "status": status,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }
+
+        # Write to temporary files first, so that no half-written entry is served
+        old_size = self._size(key)
+        with open(key + ".body.tmp", "wb") as f:
+            f.write(content)
+        os.replace(key + ".body.tmp", key + ".body")
+        self._write_meta(key, entry)
+
+        # An overwritten entry no longer counts towards the size of the cache
+        self.size += self._size(key) - old_size
+        if self.size > self.max_size:
+            self.evict()
+
+    def store_file(self, url, status, headers, path):
+        """Writes a response whose body was streamed to path to the cache.
+
+        The file is hard linked into the cache if possible, otherwise copied.
+
+        """
+        if status not in self.cacheable:
+            return
+        key = self._key(url)
+        os.makedirs(os.path.dirname(key), exist_ok=True)
+        old_size = self._size(key)
+        link_or_copy(path, key + ".body")
+        entry = {
+            "url": url,
+            "status": status,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }
+        self._write_meta(key, entry)
+
+        self.size += self._size(key) - old_size
+        if self.size > self.max_size:
+            self.evict()
+
+    def refresh(self, url, entry):
+        """Marks entry as revalidated after a 304 response."""
+        entry = {k: v for k, v in entry.items() if k not in ["content", "path"]}
+        entry["fetched_at"] = time.time()
+        key = self._key(url)
+        old_size = self._size(key)
+        self._write_meta(key, entry)
+        self.size += self._size(key) - old_size
+
+    def evict(self):
+        """Removes the least recently used entries until the cache is below 90% of
+        max_size."""
+        entries = sorted(self._entries())
+        self.size = sum(size for _, _, size in entries)
+        for _, key, size in entries:
+            if self.size <= 0.9 * self.max_size:
+                break
+            for ending in [".json", ".body"]:
+                if os.path.exists(key + ending):
+                    os.remove(key + ending)
+            self.size -= size
+
+
+def link_or_copy(src, dst):
+    """Atomically replaces dst by a hard link to (or if not possible a copy of) src."""
+    tmp = dst + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def count_stat(stats, key, n=1):
+    if stats is not None:
+        stats[key] += n
+
+
+def cached_get(url, cache=None, session=None, stats=None, max_age=None):
+    """Sends a GET request to url, using cache if available.
+
+    Args:
+        url: string
+        cache: HttpCache or None
+        session: requests session (defaults to requests.get)
+        stats: collections.Counter that counts requests and downloaded bytes
+        max_age: seconds after which the cached response is revalidated (None for
+            cache.max_age, 0 for a conditional request every time)
+
+    Returns:
+        status code and body of the response
+
+    """
+    import requests
+
+    get = session.get if session is not None else requests.get
+
+    entry = None
+    headers = {}
+    if cache is not None:
+        entry = cache.lookup(url)
+        if entry is not None and (cache.offline or cache.is_fresh(entry, max_age)):
+            count_stat(stats, "cached")
+            return entry["status"], entry["content"]
+        if cache.offline:
+            return cache.status_miss, b""
+        headers = cache.validators(entry)
+
+    response = get(url, headers=headers)
+    count_stat(stats, "get")
+    count_stat(stats, "bytes", len(response.content))
+
+    if cache is None:
+        return response.status_code, response.content
+
+    if response.status_code == 304 and entry is not None:
+        cache.refresh(url, entry)
+        return entry["status"], entry["content"]
+
+    cache.store(url, response.status_code, response.headers, response.content)
+    return response.status_code, response.content
+
+
+def cached_head(url, cache=None, session=None, stats=None, max_age=None):
+    """Checks with a HEAD request whether url exists, using cache if available.
+
+    404s are stored in the cache, so they are not requested again before the ttl
+    has passed.
+
+    Args:
+        url: string
+        cache: HttpCache or None
+        session: requests session (defaults to requests.head)
+        stats: collections.Counter that counts requests
+        max_age: seconds after which the cached response is requested again (None
+            for the ttl of the cache, 0 to bypass the cached misses)
+
+    Returns:
+        status code of the response
+
+    """
+    import requests
+
+    head = session.head if session is not None else requests.head
+
+    if cache is not None:
+        entry = cache.lookup(url)
+        if entry is not None and (cache.offline or cache.is_fresh(entry, max_age)):
+            count_stat(stats, "cached")
+            return entry["status"]
+        if cache.offline:
+            return cache.status_miss
+
+    response = head(url, allow_redirects=True)
+    count_stat(stats, "head")
+
+    if cache is not None and response.status_code == 404:
+        cache.store(url, 404, response.headers, b"")
+    return response.status_code
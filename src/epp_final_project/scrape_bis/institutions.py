@@ -0,0 +1,76 @@
+# Import packages
+import re
+
+# Import lists
+import epp_final_project.scrape_bis.lists as lists
+
+### Match institutions in a text with one precompiled pattern
+
+
+def _trie_pattern(words):
+    """Returns a regular expression that matches the longest of words at a position.
+
+    The words are merged into a trie, so that the pattern branches on the next
+    character only and its cost does not grow with the number of words.
+
+    Args:
+        words: list of strings
+
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def pattern(node):
+        branches = [
+            re.escape(char) + pattern(child) for char, child in node.items() if char
+        ]
+        if not branches:
+            return ""
+        group = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # Word can end here, but longer words are preferred
+            return "(?:" + group + ")?"
+        return group
+
+    return re.compile(pattern(trie))
+
+
+# Canonical institution and country of each name (lower case)
+ALIASES = {
+    alias.lower(): canonical
+    for canonical, (_, aliases) in lists.institution_aliases.items()
+    for alias in aliases + [canonical]
+}
+COUNTRIES = {
+    canonical: country for canonical, (country, _) in lists.institution_aliases.items()
+}
+PATTERN = _trie_pattern(ALIASES)
+
+
+def match_institution(text):
+    """Finds the institution that is mentioned first in text.
+
+    If several names start at the same position, the longest one is chosen.
+
+    Args:
+        text: string, e.g. the meta data of a speech
+
+    Returns:
+        canonical institution (lower case), position of the match in text and
+        country of the institution; (None, -1, None) if no institution is mentioned
+
+    """
+    match = PATTERN.search(text.lower())
+    if match is None:
+        return None, -1, None
+    canonical = ALIASES[match.group()]
+    return canonical, match.start(), COUNTRIES[canonical]
+
+
+def canonical_institution(text):
+    """Returns the canonical name of the institution mentioned first in text."""
+    return match_institution(text)[0]
@@ -1,193 +1,241 @@
 # Import packages
 import datetime as dt
 
-# List of institutions.
-institutions = [
-    "People's Bank of China",
-    "Bank Indonesia",
-    "Bank of Albania",
-    "Bank of Algeria",
-    "Bank of Botswana",
-    "Bank of Canada",
-    "Bank of England",
-    "Bank of Estonia",
-    "Bank of Finland",
-    "Bank of France",
-    "Bank of Ghana",
-    "Bank of Greece",
-    "Bank of Guatemala",
-    "Bank of Guyana",
-    "Bank of Israel",
-    "Bank of Italy",
-    "Bank of Jamaica",
-    "Bank of Japan",
-    "Bank of Korea",
-    "Bank of Latvia",
-    "Bank of Lithuania",
-    "Bank of Mauritius",
-    "Bank of Mexico",
-    "Bank of Morocco",
-    "Bank of Mozambique",
-    "Bank of Namibia",
-    "Bank of Papua New Guinea",
-    "Bank of Portugal",
-    "Bank of Sierra Leone",
-    "Bank of Slovenia",
-    "Bank of Spain",
-    "Bank of Tanzania",
-    "Bank of Thailand",
-    "Bank of Uganda",
-    "Bank of Zambia",
-    "Board of Governors of the Federal Reserve System",
-    "Bulgarian National Bank",
-    "Central Bank of Argentina",
-    "Central Bank of Aruba",
-    "Central Bank of Bahrain",
-    "Central Bank of Barbados",
-    "Central Bank of Belize",
-    "Central Bank of Bolivia",
-    "Central Bank of Bosnia and Herzegovina",
-    "Central Bank of Brazil",
-    "Central Bank of Chile",
-    "Central Bank of Colombia",
-    "Central Bank of Curaçao and Sint Maarten",
-    "Central Bank of Cyprus",
-    "Central Bank of Iceland",
-    "Central Bank of Ireland",
-    "Central Bank of Jordan",
-    "Central Bank of Kenya",
-    "Central Bank of Kuwait",
-    "Central Bank of Luxembourg",
-    "Central Bank of Malaysia",
-    "Central Bank of Malta",
-    "Central Bank of Nepal",
-    "Central Bank of Nigeria",
-    "Central Bank of Norway",
-    "Central Bank of Samoa",
-    "Central Bank of Seychelles",
-    "Central Bank of Solomon Islands",
-    "Central Bank of Sri Lanka",
-    "Central Bank of The Bahamas",
-    "Central Bank of Trinidad and Tobago",
-    "Central Bank of Uruguay",
-    "central bank of the Philippines",
-    "Central Bank of the Republic of Kosovo",
-    "Central Bank of the Republic of Turkey",
-    "Bank of Russia",
-    "Central Bank of the United Arab Emirates",
-    "Croatian National Bank",
-    "Czech National Bank",
-    "National Bank of Denmark",
-    "Deutsche Bundesbank",
-    "Eastern Caribbean Central Bank",
-    "European Central Bank",
-    "Federal Reserve Bank of Atlanta",
-    "Federal Reserve Bank of Boston",
-    "Federal Reserve Bank of Chicago",
-    "Federal Reserve Bank of Dallas",
-    "Federal Reserve Bank of Kansas City",
-    "Federal Reserve Bank of Minneapolis",
-    "Federal Reserve Bank of New York",
-    "Federal Reserve Bank of Philadelphia",
-    "Federal Reserve Bank of Richmond",
-    "Federal Reserve Bank of San Francisco",
-    "Hong Kong Monetary Authority",
-    "central bank of Hungary",
-    "Maldives Monetary Authority",
-    "Monetary Authority of Macao",
-    "Monetary Authority of Singapore",
-    "National Bank of Belgium",
-    "National Bank of Cambodia",
-    "National Bank of Romania",
-    "National Bank of Serbia",
-    "National Bank of Slovakia",
-    "National Bank of Ukraine",
-    "Central Bank of the Republic of Austria",
-    "National Bank of North Macedonia",
-    "Netherlands Bank",
-    "Reserve Bank of Australia",
-    "Reserve Bank of Fiji",
-    "Reserve Bank of India",
-    "Reserve Bank of Malawi",
-    "Reserve Bank of New Zealand",
-    "Reserve Bank of Vanuatu",
-    "Saudi Arabian Monetary Agency",
-    "South African Reserve Bank",
-    "State Bank of Pakistan",
-    "Sveriges Riksbank",
-    "Swiss National Bank",
-    "Board of Governors of the US Federal Reserve System",
-    "Bank of Sweden",
-    "Board of the US Federal Reserve System",
-    "US Federal Reserve System",
-    "European Monetary Institute",
-    "Bank for International Settlements",
-    "Norges Bank",
-    "Board of Governors of the US Federal Reserve",
-    "Nederlandsche Bank",
-    "Banque de France",
-    "International Monetary Fund",
-    "Austrian National Bank",
-    "Governors of the U.S. Federal Reserve System",
-    "Swedish Central Bank",
-    "Board of the U S Federal Reserve System",
-    "Bank of South Africa",
-    "Banque nationale suisse",
-    "Hong Kong Monetary",
-    "Oesterreichische Nationalbank",
-    "Sveriges Riskbank",
-    "Bank of India",
-    "National Bank of the Republic of Macedonia",
-    "National Bank of the Republic of North Macedonia",
-    "ECB",
-    "Authority of Ireland",
-    "Bank of Turkey",
-    "Bank of Poland",
-    "Bank of China",
-    "Board of Governors of the federal reserve",
-    "Board of governors of the us fed",
-    "Australian Reserve Bank",
-    "Sveriges Risksbank",
-    "Federal Reserve Board",
-    "Austrian Nationalbank",
-    "Bank of Australia",
-    "Board of Governors of the US Fed",
-    "Federal Reserve System",
-]
-
-# In several speehes the name of the FED is different
-# The ones in institutions_us are also included in institutions
-# One alternative to write out all combinations would ofc be to only use, e.g.,
-# "federal reserve" or similar and then it would catch all.
-inst_us = [
-    "board of governors of the federal reserve system",
-    "board of governors of the us federal reserve system",
-    "board of the us federal reserve system",
-    "us federal reserve system",
-    "board of governors of the us federal reserve",
-    "governors of the u.s. federal reserve system",
-    "board of the u s federal reserve system",
-    "board of governors of the federal reserve",
-    "board of governors of the us fed",
-    "federal reserve board",
-    "board of governors of the us fed",
-    "federal reserve system",
-]
-
-inst_swe = [
-    "sveriges riksbank",
-    "bank of sweden",
-    "sveriges riskbank",
-    "swedish central bank",
-    "sveriges risksbank",
-]
-
-inst_austria = [
-    "central bank of the republic of austria",
-    "austrian national bank",
-    "oesterreichische nationalbank",
-    "austrian nationalbank",
-]
+# Institutions: canonical name (lower case) with the country (None if the country
+# is not covered by the populism data) and all names the institution is written
+# with on the BIS website. Several institutions are written differently (or wrong)
+# in some speeches, e.g. the FED. All names are matched case insensitive.
+institution_aliases = {
+    "central bank of argentina": ("Argentina", ["Central Bank of Argentina"]),
+    "reserve bank of australia": (
+        "Australia",
+        ["Reserve Bank of Australia", "Australian Reserve Bank", "Bank of Australia"],
+    ),
+    "central bank of the republic of austria": (
+        "Austria",
+        [
+            "Central Bank of the Republic of Austria",
+            "Austrian National Bank",
+            "Oesterreichische Nationalbank",
+            "Austrian Nationalbank",
+        ],
+    ),
+    "national bank of belgium": ("Belgium", ["National Bank of Belgium"]),
+    "central bank of bolivia": ("Bolivia", ["Central Bank of Bolivia"]),
+    "central bank of brazil": ("Brazil", ["Central Bank of Brazil"]),
+    "bulgarian national bank": ("Bulgaria", ["Bulgarian National Bank"]),
+    "bank of canada": ("Canada", ["Bank of Canada"]),
+    "central bank of chile": ("Chile", ["Central Bank of Chile"]),
+    "people's bank of china": ("China", ["People's Bank of China", "Bank of China"]),
+    "central bank of colombia": ("Colombia", ["Central Bank of Colombia"]),
+    "croatian national bank": ("Croatia", ["Croatian National Bank"]),
+    "central bank of cyprus": ("Cyprus", ["Central Bank of Cyprus"]),
+    "czech national bank": ("Czech Republic", ["Czech National Bank"]),
+    "national bank of denmark": ("Denmark", ["National Bank of Denmark"]),
+    "european central bank": ("ECB", ["European Central Bank", "ECB"]),
+    "central bank of ecuador": ("Ecuador", ["Central Bank of Ecuador"]),
+    "central bank of egypt": ("Egypt", ["Central Bank of Egypt"]),
+    "bank of estonia": ("Estonia", ["Bank of Estonia"]),
+    "bank of finland": ("Finland", ["Bank of Finland"]),
+    "bank of france": ("France", ["Bank of France", "Banque de France"]),
+    "deutsche bundesbank": ("Germany", ["Deutsche Bundesbank"]),
+    "bank of greece": ("Greece", ["Bank of Greece"]),
+    "central bank of hungary": ("Hungary", ["central bank of Hungary"]),
+    "central bank of iceland": ("Iceland", ["Central Bank of Iceland"]),
+    "reserve bank of india": ("India", ["Reserve Bank of India", "Bank of India"]),
+    "bank indonesia": ("Indonesia", ["Bank Indonesia"]),
+    "central bank of ireland": (
+        "Ireland",
+        ["Central Bank of Ireland", "Authority of Ireland"],
+    ),
+    "bank of israel": ("Israel", ["Bank of Israel"]),
+    "bank of italy": ("Italy", ["Bank of Italy"]),
+    "bank of japan": ("Japan", ["Bank of Japan"]),
+    "bank of latvia": ("Latvia", ["Bank of Latvia"]),
+    "bank of lithuania": ("Lithuania", ["Bank of Lithuania"]),
+    "central bank of luxembourg": ("Luxembourg", ["Central Bank of Luxembourg"]),
+    "central bank of malaysia": ("Malaysia", ["Central Bank of Malaysia"]),
+    "central bank of malta": ("Malta", ["Central Bank of Malta"]),
+    "bank of mexico": ("Mexico", ["Bank of Mexico"]),
+    "netherlands bank": ("Netherlands", ["Netherlands Bank", "Nederlandsche Bank"]),
+    "reserve bank of new zealand": ("New Zealand", ["Reserve Bank of New Zealand"]),
+    "central bank of norway": ("Norway", ["Central Bank of Norway", "Norges Bank"]),
+    "central bank of paraguay": ("Paraguay", ["Central Bank of Paraguay"]),
+    "central reserve bank of peru": ("Peru", ["Central Reserve Bank of Peru"]),
+    "central bank of the philippines": (
+        "Philippines",
+        ["central bank of the Philippines"],
+    ),
+    "bank of poland": ("Poland", ["Bank of Poland"]),
+    "bank of portugal": ("Portugal", ["Bank of Portugal"]),
+    "national bank of romania": ("Romania", ["National Bank of Romania"]),
+    "bank of russia": ("Russia", ["Bank of Russia"]),
+    "national bank of slovakia": ("Slovakia", ["National Bank of Slovakia"]),
+    "bank of slovenia": ("Slovenia", ["Bank of Slovenia"]),
+    "south african reserve bank": (
+        "South Africa",
+        ["South African Reserve Bank", "Bank of South Africa"],
+    ),
+    "bank of korea": ("South Korea", ["Bank of Korea"]),
+    "bank of spain": ("Spain", ["Bank of Spain"]),
+    "sveriges riksbank": (
+        "Sweden",
+        [
+            "Sveriges Riksbank",
+            "Bank of Sweden",
+            "Swedish Central Bank",
+            "Sveriges Riskbank",
+            "Sveriges Risksbank",
+        ],
+    ),
+    "swiss national bank": ("Switzerland", ["Swiss National Bank"]),
+    "bank of thailand": ("Thailand", ["Bank of Thailand"]),
+    "central bank of the republic of turkey": (
+        "Turkey",
+        ["Central Bank of the Republic of Turkey", "Bank of Turkey"],
+    ),
+    "bank of england": ("United Kingdom", ["Bank of England"]),
+    "board of governors of the federal reserve system": (
+        "United States",
+        [
+            "Board of Governors of the Federal Reserve System",
+            "Board of Governors of the US Federal Reserve System",
+            "Board of the US Federal Reserve System",
+            "US Federal Reserve System",
+            "Board of Governors of the US Federal Reserve",
+            "Governors of the U.S. Federal Reserve System",
+            "Board of the U S Federal Reserve System",
+            "Board of Governors of the federal reserve",
+            "Board of governors of the us fed",
+            "Federal Reserve Board",
+            "Board of Governors of the US Fed",
+            "Federal Reserve System",
+        ],
+    ),
+    "federal reserve bank of atlanta": (
+        "United States",
+        ["Federal Reserve Bank of Atlanta"],
+    ),
+    "federal reserve bank of boston": (
+        "United States",
+        ["Federal Reserve Bank of Boston"],
+    ),
+    "federal reserve bank of chicago": (
+        "United States",
+        ["Federal Reserve Bank of Chicago"],
+    ),
+    "federal reserve bank of dallas": (
+        "United States",
+        ["Federal Reserve Bank of Dallas"],
+    ),
+    "federal reserve bank of kansas city": (
+        "United States",
+        ["Federal Reserve Bank of Kansas City"],
+    ),
+    "federal reserve bank of minneapolis": (
+        "United States",
+        ["Federal Reserve Bank of Minneapolis"],
+    ),
+    "federal reserve bank of new york": (
+        "United States",
+        ["Federal Reserve Bank of New York"],
+    ),
+    "federal reserve bank of philadelphia": (
+        "United States",
+        ["Federal Reserve Bank of Philadelphia"],
+    ),
+    "federal reserve bank of richmond": (
+        "United States",
+        ["Federal Reserve Bank of Richmond"],
+    ),
+    "federal reserve bank of san francisco": (
+        "United States",
+        ["Federal Reserve Bank of San Francisco"],
+    ),
+    "central bank of uruguay": ("Uruguay", ["Central Bank of Uruguay"]),
+    "central bank of venezuela": ("Venezuela", ["Central Bank of Venezuela"]),
+    "bank for international settlements": (
+        None,
+        ["Bank for International Settlements"],
+    ),
+    "bank of albania": (None, ["Bank of Albania"]),
+    "bank of algeria": (None, ["Bank of Algeria"]),
+    "bank of botswana": (None, ["Bank of Botswana"]),
+    "bank of ghana": (None, ["Bank of Ghana"]),
+    "bank of guatemala": (None, ["Bank of Guatemala"]),
+    "bank of guyana": (None, ["Bank of Guyana"]),
+    "bank of jamaica": (None, ["Bank of Jamaica"]),
+    "bank of mauritius": (None, ["Bank of Mauritius"]),
+    "bank of morocco": (None, ["Bank of Morocco"]),
+    "bank of mozambique": (None, ["Bank of Mozambique"]),
+    "bank of namibia": (None, ["Bank of Namibia"]),
+    "bank of papua new guinea": (None, ["Bank of Papua New Guinea"]),
+    "bank of sierra leone": (None, ["Bank of Sierra Leone"]),
+    "bank of tanzania": (None, ["Bank of Tanzania"]),
+    "bank of uganda": (None, ["Bank of Uganda"]),
+    "bank of zambia": (None, ["Bank of Zambia"]),
+    "banque nationale suisse": (None, ["Banque nationale suisse"]),
+    "central bank of aruba": (None, ["Central Bank of Aruba"]),
+    "central bank of bahrain": (None, ["Central Bank of Bahrain"]),
+    "central bank of barbados": (None, ["Central Bank of Barbados"]),
+    "central bank of belize": (None, ["Central Bank of Belize"]),
+    "central bank of bosnia and herzegovina": (
+        None,
+        ["Central Bank of Bosnia and Herzegovina"],
+    ),
+    "central bank of curaçao and sint maarten": (
+        None,
+        ["Central Bank of Curaçao and Sint Maarten"],
+    ),
+    "central bank of jordan": (None, ["Central Bank of Jordan"]),
+    "central bank of kenya": (None, ["Central Bank of Kenya"]),
+    "central bank of kuwait": (None, ["Central Bank of Kuwait"]),
+    "central bank of nepal": (None, ["Central Bank of Nepal"]),
+    "central bank of nigeria": (None, ["Central Bank of Nigeria"]),
+    "central bank of samoa": (None, ["Central Bank of Samoa"]),
+    "central bank of seychelles": (None, ["Central Bank of Seychelles"]),
+    "central bank of solomon islands": (None, ["Central Bank of Solomon Islands"]),
+    "central bank of sri lanka": (None, ["Central Bank of Sri Lanka"]),
+    "central bank of the bahamas": (None, ["Central Bank of The Bahamas"]),
+    "central bank of the republic of kosovo": (
+        None,
+        ["Central Bank of the Republic of Kosovo"],
+    ),
+    "central bank of the united arab emirates": (
+        None,
+        ["Central Bank of the United Arab Emirates"],
+    ),
+    "central bank of trinidad and tobago": (
+        None,
+        ["Central Bank of Trinidad and Tobago"],
+    ),
+    "eastern caribbean central bank": (None, ["Eastern Caribbean Central Bank"]),
+    "european monetary institute": (None, ["European Monetary Institute"]),
+    "hong kong monetary authority": (
+        None,
+        ["Hong Kong Monetary Authority", "Hong Kong Monetary"],
+    ),
+    "international monetary fund": (None, ["International Monetary Fund"]),
+    "maldives monetary authority": (None, ["Maldives Monetary Authority"]),
+    "monetary authority of macao": (None, ["Monetary Authority of Macao"]),
+    "monetary authority of singapore": (None, ["Monetary Authority of Singapore"]),
+    "national bank of cambodia": (None, ["National Bank of Cambodia"]),
+    "national bank of north macedonia": (
+        None,
+        [
+            "National Bank of North Macedonia",
+            "National Bank of the Republic of Macedonia",
+            "National Bank of the Republic of North Macedonia",
+        ],
+    ),
+    "national bank of serbia": (None, ["National Bank of Serbia"]),
+    "national bank of ukraine": (None, ["National Bank of Ukraine"]),
+    "reserve bank of fiji": (None, ["Reserve Bank of Fiji"]),
+    "reserve bank of malawi": (None, ["Reserve Bank of Malawi"]),
+    "reserve bank of vanuatu": (None, ["Reserve Bank of Vanuatu"]),
+    "saudi arabian monetary agency": (None, ["Saudi Arabian Monetary Agency"]),
+    "state bank of pakistan": (None, ["State Bank of Pakistan"]),
+}
 
 # Create List of Dates
 def date_list(small):
@@ -196,10 +244,10 @@ def date_list(small):
         date_list: list of dates in format 210101,
         from 970106 (first BIS speech) to today.
 
-    Args: 
+    Args:
         small: returns on the first day of the month to speed up computation
     """
-    
+
     today = dt.date.today()
     start = dt.date(1997, 1, 6)
     date_list = []
@@ -211,14 +259,14 @@ def date_list(small):
         while day <= today:
             # Add the current day to the list
             date_list.append(day.strftime("%y%m%d"))
-            
+
             # Move to the first day of the next month
             if day.month == 12:
                 day = dt.date(day.year + 1, 1, 1)
             else:
                 day = dt.date(day.year, day.month + 1, 1)
 
-    else: 
+    else:
 
         delta = today - start
 
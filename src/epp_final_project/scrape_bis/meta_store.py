@@ -0,0 +1,165 @@
+# Import packages
+import datetime as dt
+import os
+import sqlite3
+
+### Structured store for the meta data of the speeches
+
+# File name of the store in the pdf folder
+FILE_NAME = "meta_data.sqlite"
+
+
+def open_store(wd):
+    """Opens (and if necessary creates) the meta data store in wd.
+
+    The store uses write-ahead logging, so several scrapers (processes or threads
+    with their own connection) can write to it while it is read.
+
+    Args:
+        wd: string where pdf's are stored
+
+    Returns:
+        sqlite3 connection
+
+    """
+    conn = sqlite3.connect(os.path.join(wd, FILE_NAME), timeout=60)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS speeches (
+            id TEXT PRIMARY KEY,
+            date TEXT NOT NULL,
+            speaker TEXT,
+            institution TEXT,
+            meta TEXT,
+            url TEXT,
+            sha256 TEXT,
+            pages INTEGER
+        )
+        """,
+    )
+
+    # Add the page count to stores created before it existed
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(speeches)")]
+    if "pages" not in columns:
+        conn.execute("ALTER TABLE speeches ADD COLUMN pages INTEGER")
+    conn.commit()
+    return conn
+
+
+def write_speech(conn, speech_id, speaker, institution, meta, url=None):
+    """Stores the meta data of one speech.
+
+    The meta data of again scraped speeches is overwritten, the hash of their pdf
+    and their number of pages are kept.
+
+    Args:
+        conn: connection returned by open_store
+        speech_id: date in format 210101 plus letter, e.g. 210101a
+        speaker: name of the speaker
+        institution: normalized institution (lower case)
+        meta: meta information of the speech
+        url: url of the speech page
+
+    """
+    date = dt.datetime.strptime(speech_id[:6], "%y%m%d").strftime("%Y-%m-%d")
+    with conn:
+        conn.execute(
+            """
+            INSERT INTO speeches (id, date, speaker, institution, meta, url)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                date = excluded.date,
+                speaker = excluded.speaker,
+                institution = excluded.institution,
+                meta = excluded.meta,
+                url = excluded.url
+            """,
+            (speech_id, date, speaker, institution, meta, url),
+        )
+
+
+def write_hash(conn, speech_id, sha256):
+    """Stores the SHA-256 of the pdf of a speech."""
+    with conn:
+        conn.execute("UPDATE speeches SET sha256 = ? WHERE id = ?", (sha256, speech_id))
+
+
+def write_pages(conn, pages):
+    """Stores the number of pages of the extracted texts.
+
+    Args:
+        conn: connection returned by open_store
+        pages: dict with the number of pages of each speech id
+
+    """
+    with conn:
+        conn.executemany(
+            "UPDATE speeches SET pages = ? WHERE id = ?",
+            [(n, speech_id) for speech_id, n in pages.items()],
+        )
+
+
+def read_hashes(wd):
+    """Returns the SHA-256 of the pdf of each speech (speeches with a pdf only).
+
+    Args:
+        wd: string where pdf's are stored
+
+    Returns:
+        dict of speech ids and hashes, sorted by id
+
+    """
+    conn = sqlite3.connect(os.path.join(wd, FILE_NAME))
+    try:
+        rows = conn.execute(
+            "SELECT id, sha256 FROM speeches WHERE sha256 IS NOT NULL ORDER BY id",
+        )
+        return dict(rows.fetchall())
+    finally:
+        conn.close()
+
+
+def read_without_pages(wd):
+    """Returns the set of speech ids with a pdf but without a number of pages.
+
+    Args:
+        wd: string where pdf's are stored
+
+    """
+    conn = sqlite3.connect(os.path.join(wd, FILE_NAME))
+    try:
+        rows = conn.execute(
+            "SELECT id FROM speeches WHERE sha256 IS NOT NULL AND pages IS NULL",
+        )
+        return {row[0] for row in rows}
+    finally:
+        conn.close()
+
+
+def read_meta(wd):
+    """Reads the meta data of all speeches at once.
+
+    Args:
+        wd: string where pdf's are stored
+
+    Returns:
+        dataframe with columns filename, date, name, institution, meta_data, url,
+        sha256 and pages (named as in the dataset built from meta_data.txt)
+
+    """
+    import pandas as pd
+
+    conn = sqlite3.connect(os.path.join(wd, FILE_NAME))
+    try:
+        df = pd.read_sql_query(
+            """
+            SELECT id AS filename, date, speaker AS name, institution,
+                meta AS meta_data, url, sha256, pages
+            FROM speeches ORDER BY date, id
+            """,
+            conn,
+        )
+    finally:
+        conn.close()
+    return df
@@ -0,0 +1,353 @@
+# Import packages
+import contextlib
+import importlib.metadata
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import subprocess
+import time
+from collections import deque
+
+### Backends that extract the text of a pdf page by page
+
+# The packages of the backends are imported when the backend is used, so that only
+# the package of the chosen backend has to be installed
+
+# Characters read at once from the output of pdftotext
+CHUNK_SIZE = 64 * 1024
+
+
+def _split_pages(text):
+    # pdftotext ends every page with a form feed
+    pages = text.split("\f")
+    if pages[-1] == "":
+        pages.pop()
+    return pages
+
+
+def _textract(path_pdf):
+    import textract
+
+    # textract returns the whole text at once, only the output is streamed
+    text = textract.process(path_pdf)  # type bytes
+    text = text.decode("utf-8")  # decode to type str
+    yield from _split_pages(text)
+
+
+def _pdfminer(path_pdf):
+    import io
+
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    # Same steps as pdfminer.high_level.extract_text, but the text is taken out
+    # after each page
+    with open(path_pdf, "rb") as f, io.StringIO() as output:
+        manager = PDFResourceManager()
+        device = TextConverter(manager, output, laparams=LAParams())
+        interpreter = PDFPageInterpreter(manager, device)
+        for page in PDFPage.get_pages(f):
+            interpreter.process_page(page)
+            yield output.getvalue().rstrip("\f")
+            output.seek(0)
+            output.truncate()
+
+
+def _pypdfium2(path_pdf):
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path_pdf)
+    try:
+        for page in pdf:
+            textpage = page.get_textpage()
+            yield textpage.get_text_range().replace("\r\n", "\n")
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+
+
+def _pdftotext(path_pdf):
+    # Same call as textract, without starting textract for each pdf; the output is
+    # read while pdftotext is running and pdftotext is stopped if the pages are no
+    # longer needed
+    process = subprocess.Popen(
+        ["pdftotext", path_pdf, "-"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        encoding="utf-8",
+    )
+    try:
+        buffer = ""
+        for chunk in iter(lambda: process.stdout.read(CHUNK_SIZE), ""):
+            buffer += chunk
+            *pages, buffer = buffer.split("\f")
+            yield from pages
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, process.args)
+        if buffer:
+            yield buffer
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+
+
+# Backend name -> generator of the texts of the pages of a pdf
+BACKENDS = {
+    "textract": _textract,
+    "pdfminer": _pdfminer,
+    "pypdfium2": _pypdfium2,
+    "pdftotext": _pdftotext,
+}
+
+
+# Backend name -> distribution of its package (None for command line tools)
+PACKAGES = {
+    "textract": "textract",
+    "pdfminer": "pdfminer.six",
+    "pypdfium2": "pypdfium2",
+    "pdftotext": None,
+}
+
+
+def _pdftotext_version():
+    try:
+        result = subprocess.run(["pdftotext", "-v"], capture_output=True, text=True)
+    except OSError:
+        return "missing"
+    # e.g. "pdftotext version 22.02.0"
+    return (result.stderr or result.stdout).split()[2]
+
+
+def backend_version(backend):
+    """Returns the version of a backend, e.g. "pdfminer.six-20221105".
+
+    textract calls pdftotext, so its version includes the version of pdftotext.
+
+    """
+    package = PACKAGES[backend]
+    if package is None:
+        return "pdftotext-" + _pdftotext_version()
+    try:
+        version = package + "-" + importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        version = package + "-missing"
+    if backend == "textract":
+        version += "+pdftotext-" + _pdftotext_version()
+    return version
+
+
+### Extraction of the text of one pdf (runs in the worker processes of extract_pdfs)
+
+
+def extract_text(path_pdf, backend="textract"):
+    """Returns the text of a pdf (pages end with a form feed, as in pdftotext).
+
+    Args:
+        path_pdf: path of the pdf
+        backend: name of the backend in BACKENDS
+
+    """
+    return "".join(page + "\f" for page in BACKENDS[backend](path_pdf))
+
+
+def extract_pdf(path_pdf, path_out, backend="textract", max_pages=None, max_bytes=None):
+    """Extracts the text of a pdf and streams it page by page to path_out.
+
+    Pages end with a form feed, as in the output of pdftotext. Only the current page
+    is held in memory (except for textract, which returns the whole text at once).
+
+    Args:
+        path_pdf: path of the pdf
+        path_out: path of the txt file
+        backend: name of the backend in BACKENDS
+        max_pages: number of pages after which the extraction stops (None for all)
+        max_bytes: bytes of text after which the extraction stops (None for all)
+
+    Returns:
+        None if the text was extracted, otherwise a description of the error
+
+    """
+    # Write to a temporary file first, so that no partial text is left behind
+    tmp = path_out + ".tmp"
+    try:
+        with (
+            contextlib.closing(BACKENDS[backend](path_pdf)) as pages,
+            open(tmp, "wb") as f,
+        ):
+            size = 0
+            for n, page in enumerate(pages, 1):
+                page = (page + "\f").encode("utf-8")
+                if max_bytes is not None and size + len(page) > max_bytes:
+                    # Cut the last page at the limit (at a whole character), leaving
+                    # room for its form feed
+                    room = max_bytes - size - 1
+                    if room >= 0:
+                        page = page[:room].decode("utf-8", "ignore")
+                        f.write((page + "\f").encode("utf-8"))
+                    break
+                f.write(page)
+                size += len(page)
+                if max_pages is not None and n >= max_pages:
+                    break
+    except Exception as e:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return f"{type(e).__name__}: {e}"
+
+    os.replace(tmp, path_out)
+    return None
+
+
+def count_pages(path_text):
+    """Returns the number of pages of an extracted text (number of form feeds)."""
+    pages = 0
+    with open(path_text, encoding="utf-8") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), ""):
+            pages += chunk.count("\f")
+    return pages
+
+
+### Extraction of many pdfs in worker processes that are killed on timeout
+
+
+def _worker(conn, backend, max_pages, max_bytes):
+    # The worker leads its own process group, so that the processes started by the
+    # backend (e.g. pdftotext) can be killed together with it
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    for path_pdf, path_out in iter(conn.recv, None):
+        conn.send(extract_pdf(path_pdf, path_out, backend, max_pages, max_bytes))
+
+
+class _Worker:
+    """Worker process that extracts one pdf at a time, sent through a pipe."""
+
+    def __init__(self, args):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_worker,
+            args=(child, *args),
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+        self.job = None
+        self.deadline = None
+
+    def submit(self, job, path_pdf, path_out, timeout):
+        self.job = job
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.conn.send((path_pdf, path_out))
+
+    def kill(self):
+        """Kills the worker and the processes it started."""
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(self.process.pid, signal.SIGKILL)
+            else:
+                self.process.kill()
+        except ProcessLookupError:
+            pass
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+def extract_pdfs(
+    paths_pdf,
+    paths_out,
+    workers=None,
+    timeout=None,
+    backend="textract",
+    max_pages=None,
+    max_bytes=None,
+):
+    """Extracts the texts of many pdfs in parallel worker processes.
+
+    The timeout is enforced by this process: a worker that takes longer than timeout
+    for one pdf is killed together with the processes it started (e.g. pdftotext)
+    and replaced by a new worker. Workers that crash (e.g. in the C code of a
+    backend) are replaced as well.
+
+    Args:
+        paths_pdf: list of paths of the pdfs
+        paths_out: list of paths of the txt files
+        workers: number of worker processes (None for all cores)
+        timeout: seconds after which the extraction of one pdf is aborted (None for
+            no timeout)
+        backend: name of the backend in BACKENDS
+        max_pages: number of pages after which the extraction stops (None for all)
+        max_bytes: bytes of text after which the extraction stops (None for all)
+
+    Returns:
+        list with None for each extracted pdf, otherwise a description of the error
+
+    """
+    errors = [None] * len(paths_pdf)
+    pending = deque(range(len(paths_pdf)))
+    n_workers = min(workers or os.cpu_count() or 1, len(pending))
+    args = (backend, max_pages, max_bytes)
+    pool = [_Worker(args) for _ in range(n_workers)]
+
+    try:
+        while True:
+            for worker in pool:
+                if worker.job is None and pending:
+                    job = pending.popleft()
+                    worker.submit(job, paths_pdf[job], paths_out[job], timeout)
+            busy = [worker for worker in pool if worker.job is not None]
+            if not busy:
+                break
+
+            # Wait for the first result or the next deadline
+            deadlines = [w.deadline for w in busy if w.deadline is not None]
+            wait = None
+            if deadlines:
+                wait = max(0, min(deadlines) - time.monotonic())
+            ready = multiprocessing.connection.wait([w.conn for w in busy], wait)
+
+            for i, worker in enumerate(pool):
+                if worker.job is None:
+                    continue
+                if worker.conn in ready:
+                    try:
+                        errors[worker.job] = worker.conn.recv()
+                        worker.job = None
+                        continue
+                    except EOFError:
+                        worker.process.join()
+                        error = f"worker exited with code {worker.process.exitcode}"
+                elif (
+                    worker.deadline is not None and time.monotonic() >= worker.deadline
+                ):
+                    error = f"timeout after {timeout}s"
+                else:
+                    continue
+
+                # Replace the worker that crashed or timed out
+                errors[worker.job] = error
+                worker.kill()
+                if os.path.exists(paths_out[worker.job] + ".tmp"):
+                    os.remove(paths_out[worker.job] + ".tmp")
+                pool[i] = _Worker(args)
+    finally:
+        for worker in pool:
+            worker.stop()
+
+    return errors
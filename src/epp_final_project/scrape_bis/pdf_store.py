@@ -0,0 +1,151 @@
+# Import packages
+import hashlib
+import os
+import tempfile
+
+# Import scripts
+import epp_final_project.scrape_bis.http_cache as http_cache
+
+### Content-addressed storage of the downloaded pdfs
+
+# Subfolder of the pdf folder that holds one file per distinct pdf, named by its hash
+OBJECTS = "objects"
+
+# Bytes read and written at once
+CHUNK_SIZE = 64 * 1024
+
+
+def file_sha256(path):
+    """Returns the SHA-256 of a file, reading it in chunks."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class PdfWriter:
+    """Streams a pdf to a temporary file and stores it under its SHA-256.
+
+    The pdf is written to wd/objects/{sha256}.pdf (only once if the same pdf is
+    posted for several speeches) and linked to wd/{speech_id}.pdf, so the layout
+    of the pdf folder stays the same.
+
+    Args:
+        wd: string where pdf's are stored
+
+    """
+
+    def __init__(self, wd):
+        self.wd = wd
+        self.objects = os.path.join(wd, OBJECTS)
+        os.makedirs(self.objects, exist_ok=True)
+        self.file = None
+
+    def reset(self):
+        """Starts a new (or restarts an interrupted) download."""
+        self.discard()
+        fd, self.tmp = tempfile.mkstemp(dir=self.objects, suffix=".tmp")
+        self.file = os.fdopen(fd, "wb")
+        self.sha = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk):
+        """Appends a chunk of the pdf."""
+        self.file.write(chunk)
+        self.sha.update(chunk)
+        self.size += len(chunk)
+
+    def write_file(self, path):
+        """Copies the pdf from a file, e.g. from the http cache."""
+        self.reset()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                self.write(chunk)
+
+    def commit(self, speech_id):
+        """Stores the pdf and links it to wd/{speech_id}.pdf.
+
+        Returns:
+            path of the pdf and its SHA-256
+
+        """
+        self.file.close()
+        self.file = None
+        sha = self.sha.hexdigest()
+        path_object = os.path.join(self.objects, sha + ".pdf")
+
+        # Atomic rename, identical pdfs are stored once
+        if os.path.exists(path_object):
+            os.remove(self.tmp)
+        else:
+            os.replace(self.tmp, path_object)
+
+        path_pdf = os.path.join(self.wd, speech_id + ".pdf")
+        http_cache.link_or_copy(path_object, path_pdf)
+        return path_pdf, sha
+
+    def discard(self):
+        """Removes the temporary file of an unfinished download."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            os.remove(self.tmp)
+
+
+def download_pdf(url, wd, speech_id, cache=None, stats=None):
+    """Streams a pdf to the content-addressed store in wd.
+
+    Args:
+        url: url of the pdf
+        wd: string where pdf's are stored
+        speech_id: date in format 210101 plus letter, e.g. 210101a
+        cache: http_cache.HttpCache the responses are served from and stored in
+        stats: collections.Counter that counts requests and downloaded bytes
+
+    Returns:
+        path of the pdf and its SHA-256, (None, None) if the pdf is not available
+
+    """
+    import requests
+
+    writer = PdfWriter(wd)
+    entry = None
+    headers = {}
+
+    try:
+        if cache is not None:
+            entry = cache.lookup(url, load=False)
+            if entry is not None and (cache.offline or cache.is_fresh(entry)):
+                if entry["status"] != 200:
+                    return None, None
+                http_cache.count_stat(stats, "cached")
+                writer.write_file(entry["path"])
+                return writer.commit(speech_id)
+            if cache.offline:
+                return None, None
+            headers = cache.validators(entry)
+
+        with requests.get(url, headers=headers, stream=True) as response:
+            http_cache.count_stat(stats, "get")
+            if response.status_code == 304 and entry is not None:
+                cache.refresh(url, entry)
+                writer.write_file(entry["path"])
+                return writer.commit(speech_id)
+            if response.status_code != 200:
+                if cache is not None:
+                    cache.store(url, response.status_code, response.headers, b"")
+                return None, None
+
+            writer.reset()
+            for chunk in response.iter_content(CHUNK_SIZE):
+                writer.write(chunk)
+            http_cache.count_stat(stats, "bytes", writer.size)
+            path_pdf, sha = writer.commit(speech_id)
+
+            if cache is not None:
+                cache.store_file(url, 200, response.headers, path_pdf)
+            return path_pdf, sha
+
+    finally:
+        writer.discard()
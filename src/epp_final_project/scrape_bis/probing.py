@@ -0,0 +1,74 @@
+# Import packages
+import string
+
+### Find the number of speeches of a date with as few requests as possible
+
+# Speeches of one date are numbered with consecutive letters, starting at "a"
+LETTERS = list(string.ascii_lowercase)
+
+
+def _search(n, gallop):
+    """Generator that yields the letter positions to probe.
+
+    The caller sends back whether the speech at that position exists. Since the
+    letters of a date are consecutive, the speeches form a prefix of LETTERS and
+    the generator returns its length.
+
+    Args:
+        n: number of positions
+        gallop: use galloping (exponential, then binary) search instead of a linear scan
+
+    """
+    if not gallop:
+        for i in range(n):
+            if not (yield i):
+                return i
+        return n
+
+    # Probe positions 0, 1, 3, 7, 15, ... until the first miss (lo: last hit, hi: first
+    # miss)
+    lo, hi = -1, n
+    while 2 * lo + 1 < n:
+        i = max(2 * lo + 1, 0)
+        if (yield i):
+            lo = i
+        else:
+            hi = i
+            break
+
+    # Binary search between the last hit and the first miss
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if (yield mid):
+            lo = mid
+        else:
+            hi = mid
+    return lo + 1
+
+
+def count_letters(exists, gallop=True):
+    """Returns the number of speeches of a date.
+
+    Args:
+        exists: function that checks whether the speech with a given letter exists
+        gallop: use galloping search instead of a linear scan
+
+    """
+    search = _search(len(LETTERS), gallop)
+    try:
+        i = next(search)
+        while True:
+            i = search.send(exists(LETTERS[i]))
+    except StopIteration as stop:
+        return stop.value
+
+
+async def count_letters_async(exists, gallop=True):
+    """Same as count_letters, for a coroutine function exists."""
+    search = _search(len(LETTERS), gallop)
+    try:
+        i = next(search)
+        while True:
+            i = search.send(await exists(LETTERS[i]))
+    except StopIteration as stop:
+        return stop.value
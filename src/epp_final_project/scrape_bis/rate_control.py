@@ -0,0 +1,170 @@
+# Import packages
+import asyncio
+import collections
+import random
+import time
+
+### Adaptive concurrency control for the asynchronous scraper
+
+# Responses that signal that the server is overloaded
+THROTTLE_STATUS = (429, 503)
+
+# Responses that are retried
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class AdaptiveLimiter:
+    """Limits the number of requests in flight to one host (AIMD).
+
+    The limit grows additively (by about one request per round trip) while the
+    latency stays close to the lowest latency seen so far, and is cut
+    multiplicatively on 429/503 responses, timeouts and latency spikes. After
+    breaker_threshold consecutive failures the circuit breaker opens and no request
+    is sent for breaker_cooldown seconds. Then the breaker is half-open: a single
+    request is let through, which closes the breaker if it succeeds and opens it
+    again if it fails.
+
+    Args:
+        max_limit: maximum number of requests in flight
+        min_limit: minimum number of requests in flight
+        initial_limit: number of requests in flight at the start
+        backoff: factor the limit is multiplied with on throttling
+        latency_tolerance: latency spike relative to the lowest latency
+        breaker_threshold: number of consecutive failures that open the breaker
+        breaker_cooldown: seconds the breaker stays open
+        window: seconds over which req/s and the error rate are computed
+
+    """
+
+    def __init__(
+        self,
+        max_limit=16,
+        min_limit=1,
+        initial_limit=4,
+        backoff=0.5,
+        latency_tolerance=2.0,
+        breaker_threshold=10,
+        breaker_cooldown=30,
+        window=10,
+    ):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.window = window
+
+        self.in_flight = 0
+        self.min_latency = None
+        self.last_decrease = 0
+        self.consecutive_failures = 0
+        self.open_until = 0
+        self.half_open = False
+        self.condition = asyncio.Condition()
+        self.recent = collections.deque()
+        self.counters = collections.Counter()
+
+    async def acquire(self):
+        """Waits for a free slot (and until the circuit breaker is closed)."""
+        async with self.condition:
+            while True:
+                delay = self.open_until - time.monotonic()
+                if delay > 0:
+                    self.condition.release()
+                    try:
+                        await asyncio.sleep(delay)
+                    finally:
+                        await self.condition.acquire()
+                    continue
+                if self.half_open and self.in_flight == 0:
+                    break
+                if not self.half_open and self.in_flight < int(self.limit):
+                    break
+                await self.condition.wait()
+            self.in_flight += 1
+
+    async def release(self, latency, status):
+        """Frees the slot and adapts the limit.
+
+        Args:
+            latency: seconds until the response headers arrived
+            status: http status code, None for timeouts and connection errors
+
+        """
+        now = time.monotonic()
+        failed = status is None or status in THROTTLE_STATUS
+
+        async with self.condition:
+            self.in_flight -= 1
+            self.counters["requests"] += 1
+            self.recent.append((now, failed))
+            self._trim(now)
+
+            if failed:
+                self.counters["errors"] += 1
+                self.counters["throttled" if status else "timeouts"] += 1
+                self.consecutive_failures += 1
+                self._decrease(now, latency)
+                if (
+                    self.half_open
+                    or self.consecutive_failures >= self.breaker_threshold
+                ):
+                    self.open_until = now + self.breaker_cooldown
+                    self.half_open = True
+                    self.consecutive_failures = 0
+                    self.counters["breaker_opened"] += 1
+            else:
+                self.consecutive_failures = 0
+                self.half_open = False
+                if self.min_latency is None or latency < self.min_latency:
+                    self.min_latency = latency
+                if latency > self.latency_tolerance * self.min_latency:
+                    self._decrease(now, latency)
+                else:
+                    self.limit = min(self.limit + 1 / self.limit, self.max_limit)
+
+            self.condition.notify_all()
+
+    def _decrease(self, now, latency):
+        # Cut the limit at most once per round trip, so that one burst of throttled
+        # responses does not collapse the limit
+        if now - self.last_decrease < latency:
+            return
+        self.limit = max(self.limit * self.backoff, self.min_limit)
+        self.last_decrease = now
+
+    def retry_delay(self, attempt, retry_after=None, base=0.5, cap=60):
+        """Returns the seconds to wait before retrying (exponential, full jitter).
+
+        Args:
+            attempt: number of the failed attempt, starting at 0
+            retry_after: value of the Retry-After header in seconds, if any
+
+        """
+        self.counters["retries"] += 1
+        delay = random.uniform(0, min(cap, base * 2**attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _trim(self, now):
+        while self.recent and self.recent[0][0] < now - self.window:
+            self.recent.popleft()
+
+    def snapshot(self):
+        """Returns the live counters (req/s, error rate, in flight, limit, ...)."""
+        now = time.monotonic()
+        self._trim(now)
+        n = len(self.recent)
+        errors = sum(failed for _, failed in self.recent)
+        return {
+            "req_per_s": n / self.window,
+            "error_rate": errors / n if n else 0.0,
+            "in_flight": self.in_flight,
+            "limit": int(self.limit),
+            "breaker_open": self.open_until > now,
+            "breaker_half_open": self.half_open and self.open_until <= now,
+            **self.counters,
+        }
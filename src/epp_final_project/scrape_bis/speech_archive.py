@@ -0,0 +1,201 @@
+# Import packages
+import datetime as dt
+import glob
+import hashlib
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+### Compressed archive of the speeches, one shard per year
+
+# File name of the offset index in the archive folder
+INDEX = "index.sqlite"
+
+
+class SpeechArchive:
+    """Stores the texts of the speeches in zstd-compressed shards.
+
+    Each speech is one zstd frame in the shard of its year ({year}.zst). The offset
+    index (index.sqlite) gives the shard, offset and length of each frame, so a
+    single speech can be read without decompressing the shard, and all speeches of
+    a shard are read with one sequential read. It also stores the SHA-256 of each
+    text, so that unchanged texts are not appended again.
+
+    Args:
+        path: folder of the archive
+        level: zstd compression level
+
+    """
+
+    def __init__(self, path, level=10):
+        import zstandard
+
+        self.path = str(path)
+        os.makedirs(self.path, exist_ok=True)
+        self.compressor = zstandard.ZstdCompressor(level=level)
+        self.decompressor = zstandard.ZstdDecompressor()
+        self.conn = sqlite3.connect(os.path.join(self.path, INDEX), timeout=60)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS speeches (
+                id TEXT PRIMARY KEY,
+                shard TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT
+            )
+            """,
+        )
+
+        # Add the hash column to archives created before it existed
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(speeches)")]
+        if "sha256" not in columns:
+            self.conn.execute("ALTER TABLE speeches ADD COLUMN sha256 TEXT")
+        self.conn.commit()
+
+    def _shard(self, speech_id):
+        year = dt.datetime.strptime(speech_id[:6], "%y%m%d").year
+        return f"{year}.zst"
+
+    def add_many(self, texts):
+        """Appends speeches to their shards.
+
+        Speeches whose text is already in the archive are skipped. A speech that is
+        added again with a changed text is appended again and the index points to
+        the new text (the old frame stays in the shard).
+
+        Args:
+            texts: iterable of (speech id, text)
+
+        Returns:
+            number of speeches that were appended
+
+        """
+        hashes = dict(self.conn.execute("SELECT id, sha256 FROM speeches"))
+        rows = []
+        files = {}
+        try:
+            for speech_id, text in texts:
+                data = text.encode("utf-8")
+                sha = hashlib.sha256(data).hexdigest()
+                if hashes.get(speech_id) == sha:
+                    continue
+                shard = self._shard(speech_id)
+                if shard not in files:
+                    files[shard] = open(os.path.join(self.path, shard), "ab")
+                f = files[shard]
+                frame = self.compressor.compress(data)
+                rows.append((speech_id, shard, f.tell(), len(frame), len(data), sha))
+                f.write(frame)
+        finally:
+            for f in files.values():
+                f.close()
+
+        # The index is only updated once the frames are written
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO speeches VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def get(self, speech_id):
+        """Returns the text of one speech, None if it is not in the archive."""
+        row = self.conn.execute(
+            "SELECT shard, offset, length FROM speeches WHERE id = ?",
+            (speech_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        shard, offset, length = row
+        with open(os.path.join(self.path, shard), "rb") as f:
+            f.seek(offset)
+            frame = f.read(length)
+        return self.decompressor.decompress(frame).decode("utf-8")
+
+    def ids(self):
+        """Returns the set of speech ids in the archive."""
+        return {row[0] for row in self.conn.execute("SELECT id FROM speeches")}
+
+    def _rows(self, shard):
+        return self.conn.execute(
+            "SELECT id, offset, length FROM speeches WHERE shard = ?",
+            (shard,),
+        ).fetchall()
+
+    def _decompress_shard(self, shard, rows):
+        import zstandard
+
+        # Own decompressor, so that shards can be decompressed in parallel threads
+        decompressor = zstandard.ZstdDecompressor()
+        with open(os.path.join(self.path, shard), "rb") as f:
+            data = memoryview(f.read())
+        return {
+            speech_id: decompressor.decompress(
+                data[offset : offset + length],
+            ).decode("utf-8")
+            for speech_id, offset, length in rows
+        }
+
+    def read_shard(self, shard):
+        """Returns a dict with the text of each speech in a shard (one read)."""
+        return self._decompress_shard(shard, self._rows(shard))
+
+    def shards(self):
+        """Returns the names of the shards in the archive."""
+        return [
+            row[0] for row in self.conn.execute("SELECT DISTINCT shard FROM speeches")
+        ]
+
+    def read_all(self, workers=None):
+        """Returns a dict with the text of each speech in the archive.
+
+        The shards are read and decompressed in parallel threads (zstd releases the
+        GIL).
+
+        Args:
+            workers: number of threads (None for the default of ThreadPoolExecutor)
+
+        """
+        shards = self.shards()
+        rows = [self._rows(shard) for shard in shards]
+        texts = {}
+        with ThreadPoolExecutor(workers) as pool:
+            for shard_texts in pool.map(self._decompress_shard, shards, rows):
+                texts.update(shard_texts)
+        return texts
+
+    def close(self):
+        self.conn.close()
+
+
+def pack_texts(wd_text, path_archive):
+    """Moves the txt files of the speeches into the archive.
+
+    pdf_to_txt links all texts again once they are moved, so the texts that are
+    already in the archive are skipped (see SpeechArchive.add_many) and the shards
+    only grow by the new and changed speeches.
+
+    Args:
+        wd_text: string where the txt files ({speech id}.pdf.txt) are stored
+        path_archive: folder of the archive
+
+    Returns:
+        number of speeches that were added to the archive
+
+    """
+    files = sorted(glob.glob(os.path.join(wd_text, "*.pdf.txt")))
+
+    def texts():
+        for file in files:
+            with open(file, encoding="utf-8") as f:
+                yield os.path.basename(file)[: -len(".pdf.txt")], f.read()
+
+    archive = SpeechArchive(path_archive)
+    added = archive.add_many(texts())
+    archive.close()
+
+    for file in files:
+        os.remove(file)
+    return added
@@ -2,6 +2,16 @@
 
 from epp_final_project.config import BLD
 from epp_final_project.config import SRC
+from epp_final_project.config import SCRAPE_CONCURRENCY
+from epp_final_project.config import SCRAPE_RATE_LIMIT
+from epp_final_project.config import SCRAPE_OFFLINE
+from epp_final_project.config import SCRAPE_DISCOVERY
+from epp_final_project.config import SCRAPE_PROBE
+from epp_final_project.config import PDF_WORKERS
+from epp_final_project.config import PDF_TIMEOUT
+from epp_final_project.config import PDF_BACKEND
+from epp_final_project.config import PDF_MAX_PAGES
+from epp_final_project.config import PDF_MAX_BYTES
 
 # Import packages
 import os
@@ -9,45 +19,98 @@ import pytask
 
 # Import scripts
 import epp_final_project.scrape_bis.bis_scraper as f
+import epp_final_project.scrape_bis.async_scraper as a
+import epp_final_project.scrape_bis.discovery as discovery
+import epp_final_project.scrape_bis.http_cache as http_cache
+import epp_final_project.scrape_bis.speech_archive as speech_archive
+import epp_final_project.scrape_bis.text_cache as text_cache
+import epp_final_project.storage as storage
 
 ##########################
-# Call BIS scraper 
+# Call BIS scraper
 ##########################
 @pytask.mark.produces(
-    {
-        "path_data": BLD / "data",
-        "path_scrape": BLD / "data" / "raw" /"pdf"
-    }
+    {"path_data": BLD / "data", "path_scrape": BLD / "data" / "raw" / "pdf"}
 )
 def task_bis_scraper(produces):
     if not os.path.exists(produces["path_data"]):
         os.makedirs(produces["path_data"])
     if not os.path.exists(produces["path_scrape"]):
         os.makedirs(produces["path_scrape"])
-    f.bis_scraper(produces["path_scrape"])
+    # The crawl index and the http cache persist between runs, so only new speeches
+    # are scraped and unchanged responses are not downloaded again
+    cache = http_cache.HttpCache(
+        BLD / "data" / "raw" / "http_cache",
+        offline=SCRAPE_OFFLINE,
+    )
+    speech_ids = None
+    if SCRAPE_DISCOVERY:
+        speech_ids = discovery.discover_speech_ids(cache=cache)
+    a.bis_scraper_async(
+        produces["path_scrape"],
+        max_concurrency=SCRAPE_CONCURRENCY,
+        rate_limit=SCRAPE_RATE_LIMIT,
+        index_path=BLD / "data" / "raw" / "crawl_index.sqlite",
+        since_last=True,
+        cache=cache,
+        speech_ids=speech_ids,
+        probe=SCRAPE_PROBE,
+    )
+
 
 ##########################
-# Call function that transforms pdf's into txts 
+# Call function that transforms pdf's into txts
 ##########################
 
-@pytask.mark.depends_on(BLD / "data" / "raw" /"pdf") 
-@pytask.mark.produces(BLD / "data" / "raw"/"txt") 
+
+@pytask.mark.depends_on(BLD / "data" / "raw" / "pdf")
+@pytask.mark.produces(BLD / "data" / "raw" / "txt")
 def task_pdf_to_txt(depends_on, produces):
     if not os.path.exists(produces):
         os.makedirs(produces)
-    f.pdf_to_txt(depends_on, produces)
+    # Texts are cached by pdf hash and backend version, so they are only extracted
+    # again if the pdf or the backend changed
+    cache = text_cache.TextCache(
+        BLD / "data" / "raw" / "text_cache",
+        PDF_BACKEND,
+        max_pages=PDF_MAX_PAGES,
+        max_bytes=PDF_MAX_BYTES,
+    )
+    f.pdf_to_txt(
+        depends_on,
+        produces,
+        workers=PDF_WORKERS,
+        timeout=PDF_TIMEOUT,
+        backend=PDF_BACKEND,
+        cache=cache,
+        max_pages=PDF_MAX_PAGES,
+        max_bytes=PDF_MAX_BYTES,
+    )
+
+
+##########################
+# Pack the txts into the compressed speech archive (one shard per year)
+##########################
+
+
+@pytask.mark.depends_on(BLD / "data" / "raw" / "txt")
+@pytask.mark.produces(BLD / "data" / "raw" / "speeches")
+def task_pack_speeches(depends_on, produces):
+    speech_archive.pack_texts(depends_on, produces)
+
 
 ##########################
-# Call function that combines the dataset and pickle
+# Call function that combines the dataset and save it as parquet
 ##########################
 
+
 @pytask.mark.depends_on(
     {
-        "path_txt": BLD / "data" / "raw"/"txt",
-        "path_meta": BLD / "data" / "raw" /"pdf"
+        "path_txt": BLD / "data" / "raw" / "speeches",
+        "path_meta": BLD / "data" / "raw" / "pdf",
     }
 )
-@pytask.mark.produces(BLD / "data" / "raw" /"merged_raw.pickle") 
+@pytask.mark.produces(BLD / "data" / "raw" / "merged_raw.parquet")
 def task_construct_dataset(depends_on, produces):
     combined = f.construct_dataset(depends_on["path_txt"], depends_on["path_meta"])
-    combined.to_pickle(produces)
\ No newline at end of file
+    storage.write_parquet(combined, produces)
@@ -0,0 +1,43 @@
+# Import packages
+import os
+
+# Import scripts
+import epp_final_project.scrape_bis.pdf_extract as pdf_extract
+
+### Cache of the extracted texts
+
+
+class TextCache:
+    """Stores the text of each pdf once per backend and backend version.
+
+    The texts are stored as path/{backend version}/{sha256 of the pdf}.txt, so a
+    pdf is only extracted again if it changed or the backend was changed or
+    updated. Texts that are capped are stored in a separate folder per cap.
+
+    Args:
+        path: folder of the cache
+        backend: name of the text extraction backend (see pdf_extract.BACKENDS)
+        max_pages: number of pages the texts are capped at (None for all)
+        max_bytes: bytes the texts are capped at (None for all)
+
+    """
+
+    def __init__(self, path, backend, max_pages=None, max_bytes=None):
+        self.backend = backend
+        self.version = pdf_extract.backend_version(backend)
+        folder = self.version
+        if max_pages is not None:
+            folder += f"-pages{max_pages}"
+        if max_bytes is not None:
+            folder += f"-bytes{max_bytes}"
+        self.folder = os.path.join(str(path), folder)
+        os.makedirs(self.folder, exist_ok=True)
+
+    def path_text(self, sha):
+        """Returns the path of the text of the pdf with hash sha."""
+        return os.path.join(self.folder, sha + ".txt")
+
+    def lookup(self, sha):
+        """Returns the path of the text of the pdf with hash sha, None if not cached."""
+        path = self.path_text(sha)
+        return path if os.path.exists(path) else None
@@ -0,0 +1,159 @@
+"""This module reads and writes the intermediate datasets of the project."""
+# Import packages
+import itertools
+import os
+import shutil
+
+# pyarrow is imported in the functions that use it, so that collecting the tasks
+# does not import it
+
+# Import scripts
+import epp_final_project.tokens as tokens
+
+### Columnar storage of the datasets (Parquet, one folder per year)
+
+
+def write_parquet(df, path, partition_cols=("year",)):
+    """Writes a dataframe as Parquet dataset, partitioned by year.
+
+    An existing dataset at path is replaced. The index is not stored.
+
+    Args:
+        df: dataframe
+        path: folder of the dataset
+        partition_cols: columns the dataset is partitioned by (if in df)
+
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = str(path)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    partition_cols = [col for col in partition_cols if col in df.columns]
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_to_dataset(table, path, partition_cols=partition_cols or None)
+
+
+def read_parquet(path, columns=None, years=None):
+    """Reads a Parquet dataset written by write_parquet.
+
+    Only the requested columns (and years) are read from disk.
+
+    Args:
+        path: folder of the dataset
+        columns: list of columns (None for all)
+        years: list of years (None for all)
+
+    Returns:
+        dataframe (sorted by year, year as int64)
+
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(str(path), format="parquet", partitioning="hive")
+    row_filter = None
+    if years is not None and "year" in dataset.schema.names:
+        row_filter = ds.field("year").isin(years)
+    df = dataset.to_table(columns=columns, filter=row_filter).to_pandas()
+    if "year" in df.columns:
+        df["year"] = df["year"].astype("int64")
+    return df
+
+
+def write_parquet_batches(frames, path, partition_cols=("year",)):
+    """Writes dataframes one after the other to one Parquet dataset.
+
+    Only one dataframe is held in memory at a time. All dataframes must have the
+    columns of the first one. An existing dataset at path is replaced.
+
+    Args:
+        frames: iterable of dataframes
+        path: folder of the dataset
+        partition_cols: columns the dataset is partitioned by (if in the dataframes)
+
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    path = str(path)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        os.makedirs(path)
+        return
+
+    # Columns that are empty in the first dataframe (e.g. only empty lemma lists)
+    # are typed as strings, so that the other dataframes can be cast to the schema
+    schema = pa.Schema.from_pandas(first, preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            schema = schema.set(i, field.with_type(pa.string()))
+        elif pa.types.is_list(field.type) and pa.types.is_null(field.type.value_type):
+            schema = schema.set(i, field.with_type(pa.list_(pa.string())))
+    partition_cols = [col for col in partition_cols if col in first.columns]
+
+    def batches():
+        for df in itertools.chain([first], frames):
+            table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+            yield from table.to_batches()
+
+    ds.write_dataset(
+        batches(),
+        path,
+        schema=schema,
+        format="parquet",
+        partitioning=partition_cols or None,
+        partitioning_flavor="hive" if partition_cols else None,
+    )
+
+
+def iter_parquet(path, columns=None, batch_size=1000):
+    """Reads a Parquet dataset in chunks of at most batch_size rows.
+
+    Args:
+        path: folder of the dataset
+        columns: list of columns (None for all)
+        batch_size: maximum number of rows per chunk
+
+    Yields:
+        dataframes (year as int64)
+
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(str(path), format="parquet", partitioning="hive")
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        if batch.num_rows == 0:
+            continue
+        df = batch.to_pandas()
+        if "year" in df.columns:
+            df["year"] = df["year"].astype("int64")
+        yield df
+
+
+def read_tokens(path, column, vocab):
+    """Reads a column of token ids as TokenCorpus, without one list per speech.
+
+    The offsets and ids of the Parquet list column are used as they are.
+
+    Args:
+        path: folder of the dataset
+        column: name of the list column with the token ids
+        vocab: Vocabulary of the ids
+
+    Returns:
+        TokenCorpus
+
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(str(path), format="parquet", partitioning="hive")
+    lists = dataset.to_table(columns=[column]).column(column).combine_chunks()
+    return tokens.TokenCorpus(
+        lists.values.to_numpy(zero_copy_only=False),
+        lists.offsets.to_numpy(),
+        vocab,
+    )
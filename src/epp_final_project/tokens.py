@@ -0,0 +1,171 @@
+"""This module stores the lemmas of the speeches as integer ids."""
+# Import packages
+import numpy as np
+
+### Shared vocabulary and integer-encoded tokens (CSR layout)
+
+
+class Vocabulary:
+    """Maps words to integer ids (int32) and back.
+
+    The ids are assigned in the order in which the words are first seen. The
+    vocabulary is saved as text file with one word per line (id = line number).
+
+    Args:
+        words: words with ids 0, 1, ...
+
+    """
+
+    def __init__(self, words=()):
+        self.words = list(words)
+        self.ids = {word: i for i, word in enumerate(self.words)}
+
+    def __len__(self):
+        return len(self.words)
+
+    def encode(self, tokens):
+        """Returns the ids of a list of words, new words are added to the vocabulary.
+
+        Args:
+            tokens: list of words
+
+        Returns:
+            numpy array of int32
+
+        """
+        ids = self.ids
+        words = self.words
+        encoded = np.empty(len(tokens), dtype=np.int32)
+        for i, token in enumerate(tokens):
+            token_id = ids.get(token)
+            if token_id is None:
+                token_id = ids[token] = len(words)
+                words.append(token)
+            encoded[i] = token_id
+        return encoded
+
+    def lookup(self, words):
+        """Returns the ids of the words that are in the vocabulary."""
+        return np.array(
+            [self.ids[word] for word in words if word in self.ids],
+            dtype=np.int32,
+        )
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(word + "\n" for word in self.words)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(line.rstrip("\n") for line in f)
+
+
+class TokenCorpus:
+    """Tokens of many documents as one flat array of ids with document offsets.
+
+    The ids of document i are ids[offsets[i] : offsets[i + 1]] (the layout of a
+    CSR matrix and of a Parquet list column). Counting and frequency operations
+    work on the flat array instead of one Python list per document.
+
+    Args:
+        ids: numpy array of token ids
+        offsets: numpy array with the start of each document and the end of the last
+        vocab: Vocabulary of the ids
+
+    """
+
+    def __init__(self, ids, offsets, vocab):
+        self.ids = np.asarray(ids, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.vocab = vocab
+
+    @classmethod
+    def from_arrays(cls, arrays, vocab):
+        """Builds a corpus from one id array per document (e.g. a dataframe column).
+
+        Args:
+            arrays: iterable of numpy arrays of token ids
+            vocab: Vocabulary of the ids
+
+        """
+        arrays = list(arrays)
+        lengths = np.fromiter((len(a) for a in arrays), np.int64, len(arrays))
+        offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        ids = np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int32)
+        return cls(ids, offsets, vocab)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        """Returns the words of document i."""
+        ids = self.ids[self.offsets[i] : self.offsets[i + 1]]
+        return [self.vocab.words[token_id] for token_id in ids]
+
+    def lengths(self):
+        """Returns the number of tokens of each document."""
+        return np.diff(self.offsets)
+
+    def count(self, words):
+        """Returns how often any of the words occurs in each document.
+
+        Args:
+            words: list of words
+
+        Returns:
+            numpy array with one count per document
+
+        """
+        hits = np.isin(self.ids, self.vocab.lookup(words))
+        cumulative = np.concatenate([[0], np.cumsum(hits)])
+        return cumulative[self.offsets[1:]] - cumulative[self.offsets[:-1]]
+
+    def count_topics(self, topics):
+        """Counts the words of several topics in each document in one pass.
+
+        The occurrences of all topic words are counted in one pass over the ids and
+        then summed by topic, so more topics hardly add to the runtime. A word can
+        belong to several topics.
+
+        Args:
+            topics: dict of topic names and lists of words
+
+        Returns:
+            numpy array with one row per document and one column per topic
+
+        """
+        membership = np.zeros((len(self.vocab), len(topics)), dtype=np.int64)
+        for i, words in enumerate(topics.values()):
+            membership[self.vocab.lookup(words), i] = 1
+
+        # Compact index of the words that belong to any topic (-1 for the others)
+        topic_words = np.flatnonzero(membership.any(axis=1))
+        compact = np.full(len(self.vocab), -1, dtype=np.int64)
+        compact[topic_words] = np.arange(len(topic_words))
+
+        # Occurrences of each topic word per document (one bincount over all
+        # documents), then summed by topic
+        start, end = self.offsets[0], self.offsets[-1]
+        words = compact[self.ids[start:end]]
+        positions = np.flatnonzero(words >= 0)
+        documents = np.searchsorted(self.offsets, positions + start, side="right") - 1
+        word_counts = np.bincount(
+            documents * len(topic_words) + words[positions],
+            minlength=len(self) * len(topic_words),
+        ).reshape(len(self), len(topic_words))
+        return word_counts @ membership[topic_words]
+
+    def frequencies(self):
+        """Returns how often each id of the vocabulary occurs in the corpus."""
+        start, end = self.offsets[0], self.offsets[-1]
+        return np.bincount(self.ids[start:end], minlength=len(self.vocab))
+
+    def most_common(self, n):
+        """Returns the n most frequent words and their count (as Counter does)."""
+        frequencies = self.frequencies()
+        top = np.argsort(-frequencies, kind="stable")[:n]
+        return [
+            (self.vocab.words[i], int(frequencies[i])) for i in top if frequencies[i]
+        ]
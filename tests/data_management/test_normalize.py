@@ -0,0 +1,136 @@
+# Import packages
+import multiprocessing
+import random
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from nltk.tokenize import NLTKWordTokenizer
+
+# Import scripts
+import epp_final_project.data_management.lemma_cache as lemma_cache
+import epp_final_project.data_management.nltk_resources as nltk_resources
+import epp_final_project.data_management.normalize as normalize
+
+### Random speeches and a stub lemmatizer (the NLTK data is not needed)
+
+# Part of the NLTK stop words, including some that word_tokenize splits off
+STOP_WORDS = {
+    "the",
+    "a",
+    "and",
+    "of",
+    "to",
+    "in",
+    "is",
+    "can",
+    "not",
+    "t",
+    "s",
+    "don",
+    *normalize.EXTRA_STOP_WORDS,
+}
+
+WORDS = [
+    "Inflation",
+    "rates",
+    "banks",
+    "POLICY",
+    "crises",
+    "the",
+    "The",
+    "would",
+    "cannot",
+    "gonna",
+    "Wanna",
+    "gimme",
+    "lemme",
+    "gotta",
+    "don't",
+    "it's",
+    "Zürich",
+    "Straße",
+    "naïve",
+    "euro-area",
+    "2023",
+    "3.5%",
+    "U.S.",
+    "(ECB)",
+    "$100bn",
+    "--",
+    "\n",
+    "\f",
+]
+
+
+def random_speech(rng, n):
+    words = [rng.choice(WORDS) for _ in range(n)]
+    return "".join(word + rng.choice([" ", "", ", ", ". ", "\n"]) for word in words)
+
+
+class StubLemmatizer:
+    """Drops a plural s, like a (very) simple WordNet lemmatizer."""
+
+    def lemmatize(self, word):
+        return word[:-1] if len(word) > 3 and word.endswith("s") else word
+
+
+def baseline(text, stop_words, lemmatize):
+    """The lemmas as computed by data_proc before normalize_speech."""
+    speech_clean = re.sub("[^A-Za-z]+", " ", text.casefold())
+    speech_clean = " ".join(w for w in speech_clean.split() if w not in stop_words)
+    token = NLTKWordTokenizer().tokenize(speech_clean)
+    lemma_sep = [lemmatize(word) for word in token]
+    lemma = " "
+    for word in lemma_sep:
+        lemma = lemma + " " + word
+    return lemma_sep, lemma
+
+
+@pytest.fixture()
+def stub_lemmatizer(monkeypatch):
+    # The worker processes are forked, so they use the stub as well
+    monkeypatch.setattr(nltk_resources, "lemmatizer", StubLemmatizer)
+
+
+### Tests
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("seed", range(20))
+def test_normalize_speech_as_baseline(seed):
+    rng = random.Random(seed)
+    lemmatize = StubLemmatizer().lemmatize
+    for n in [0, 1, 2, 10, 200]:
+        text = random_speech(rng, n)
+        expected = baseline(text, STOP_WORDS, lemmatize)
+        assert normalize.normalize_speech(text, STOP_WORDS, lemmatize) == expected
+
+
+@pytest.mark.unit
+def test_normalize_speeches_in_pool(stub_lemmatizer):
+    rng = random.Random(0)
+    texts = [random_speech(rng, rng.randrange(50)) for _ in range(3 * 20 + 7)]
+
+    serial = lemma_cache.LemmaCache()
+    expected = normalize.normalize_speeches(texts, STOP_WORDS, serial)
+
+    # The workers start with some known lemmas and send back the new ones
+    lemmas = lemma_cache.LemmaCache()
+    lemmas.update({"inflation": "inflation", "rates": "rate"})
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(
+        2,
+        mp_context=context,
+        initializer=normalize.init_worker,
+        initargs=(STOP_WORDS, dict(lemmas)),
+    ) as pool:
+        results = normalize.normalize_speeches(texts, STOP_WORDS, lemmas, pool)
+
+    assert results == expected
+    assert dict(lemmas) == dict(serial)
+    assert lemmas.new == {
+        word: lemma
+        for word, lemma in serial.new.items()
+        if word not in {"inflation", "rates"}
+    }
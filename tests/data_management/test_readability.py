@@ -0,0 +1,92 @@
+# Import packages
+import importlib
+import random
+
+import pytest
+import textstat
+from pyphen import Pyphen
+
+# Import scripts
+import epp_final_project.data_management.readability as readability
+
+### Random texts and a stub pronouncing dictionary (the NLTK data is not needed)
+
+# Words with their phones; an empty entry falls back to pyphen, as do the words that
+# are not in the dictionary
+CMUDICT = {
+    "inflation": [["IH0", "N", "F", "L", "EY1", "SH", "AH0", "N"]],
+    "economic": [["EH2", "K", "AH0", "N", "AA1", "M", "IH0", "K"]],
+    "the": [["DH", "AH0"], ["DH", "IY0"]],
+    "bank": [["B", "AE1", "NG", "K"]],
+    "policy": [["P", "AA1", "L", "AH0", "S", "IY0"]],
+    "monetary": [["M", "AA1", "N", "AH0", "T", "EH2", "R", "IY0"]],
+    "don't": [["D", "OW1", "N", "T"]],
+    "it's": [["IH1", "T", "S"]],
+    "rate": [],
+}
+
+WORDS = [
+    *CMUDICT,
+    "Inflation",
+    "THE",
+    "unemployment",
+    "sustainability",
+    "responsibility",
+    "interest",
+    "we'll",
+    "they've",
+    "o'clock",
+    "'quoted'",
+    "euro-area",
+    "U.S.",
+    "3.5%",
+    "2023",
+    "--",
+    "(ECB)",
+    "Zürich",
+    "e.g.",
+]
+
+ENDINGS = [" ", " ", " ", ", ", ". ", "! ", "? ", "... ", ".", "\n", "; "]
+
+
+def random_text(rng, n):
+    return "".join(rng.choice(WORDS) + rng.choice(ENDINGS) for _ in range(n))
+
+
+@pytest.fixture()
+def engine(monkeypatch):
+    # textstat looks up the dictionary in the module that counts the syllables
+    module = importlib.import_module("textstat.backend.counts._count_syllables")
+    monkeypatch.setattr(module, "get_cmudict", lambda lang: CMUDICT)
+    module.count_syllables.cache_clear()
+
+    engine = readability.Readability()
+    engine.syllables.cmudict = CMUDICT
+    engine.syllables.pyphen = Pyphen(lang="en_US")
+    yield engine
+    module.count_syllables.cache_clear()
+
+
+### Tests
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("seed", range(20))
+def test_scores_as_textstat(engine, seed):
+    rng = random.Random(seed)
+    for n in [0, 1, 2, 3, 10, 100]:
+        text = random_text(rng, n).strip(rng.choice(["", " "]))
+        scores = engine.scores(text)
+        expected = {
+            "flesch_ease": textstat.flesch_reading_ease(text),
+            "flesch_grade": textstat.flesch_kincaid_grade(text),
+            "ari": textstat.automated_readability_index(text),
+            "gunning_fog": textstat.gunning_fog(text),
+        }
+        for name, value in expected.items():
+            assert scores[name] == pytest.approx(value), (name, text)
+
+        # The counts of the indices as counted by textstat
+        assert scores["words"] == textstat.lexicon_count(text)
+        assert scores["syllables"] == textstat.syllable_count(text)
@@ -0,0 +1,363 @@
+# Import packages
+import asyncio
+import collections
+import hashlib
+import os
+import sqlite3
+import threading
+
+import pytest
+from aiohttp import web
+
+# Import scripts
+import epp_final_project.scrape_bis.async_scraper as async_scraper
+import epp_final_project.scrape_bis.crawl_index as crawl_index
+import epp_final_project.scrape_bis.discovery as discovery
+import epp_final_project.scrape_bis.http_cache as http_cache
+import epp_final_project.scrape_bis.lists as lists
+import epp_final_project.scrape_bis.meta_store as meta_store
+import epp_final_project.scrape_bis.rate_control as rate_control
+
+### Local copy of the BIS review that serves fixture speeches
+
+PAGE = """
+<html><body>
+<a class="authorlnk dashed" href="#">{speaker}</a>
+<div id="extratitle-div">Speech by {speaker}, Governor of the {institution}.</div>
+</body></html>
+"""
+
+
+def fixture_speech(speaker, institution):
+    """Returns the page and the pdf of a speech."""
+    page = PAGE.format(speaker=speaker, institution=institution).encode("utf-8")
+    pdf = f"%PDF-1.4 speech of {speaker}".encode()
+    return page, pdf
+
+
+class StubServer:
+    """Serves r{date}{letter}.htm and .pdf from a dict in a background thread.
+
+    Args:
+        speeches: dict of speech ids and (page, pdf)
+        failures: dict of file names and statuses that are returned before the file
+        pages: dict of other paths (e.g. "sitemap.xml") and their content, in which
+            {root} is replaced by the url of the server
+
+    """
+
+    def __init__(self, speeches, failures=None, pages=None):
+        self.speeches = speeches
+        self.failures = {k: list(v) for k, v in (failures or {}).items()}
+        self.pages = pages or {}
+        self.requests = collections.Counter()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    async def handle(self, request):
+        name = request.match_info["name"]
+        self.requests[name] += 1
+        if self.failures.get(name):
+            status = self.failures[name].pop(0)
+            return web.Response(status=status, headers={"Retry-After": "0"})
+        speech_id, ending = os.path.splitext(name)
+        if speech_id not in self.speeches:
+            return web.Response(status=404)
+        page, pdf = self.speeches[speech_id]
+        return web.Response(body=page if ending == ".htm" else pdf)
+
+    async def handle_page(self, request):
+        path = request.match_info["path"]
+        self.requests[path] += 1
+        if path not in self.pages:
+            return web.Response(status=404)
+        return web.Response(text=self.pages[path].format(root=self.root))
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get("/review/r{name}", self.handle)
+        app.router.add_get("/{path:.+}", self.handle_page)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        return site._server.sockets[0].getsockname()[1]
+
+    def __enter__(self):
+        self.thread.start()
+        port = asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+        self.root = f"http://127.0.0.1:{port}/"
+        self.url = self.root + "review/r"
+        return self
+
+    def __exit__(self, *args):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+SPEECHES = {
+    "230301a": fixture_speech("Jane Doe", "Bank of Canada"),
+    "230301b": fixture_speech("John Roe", "Bank of Japan"),
+    "230401a": fixture_speech("Ann Poe", "Deutsche Bundesbank"),
+}
+
+
+# Listing pages: a sitemap index with nested (and relative) sitemaps and an rss feed
+LISTINGS = {
+    "sitemap.xml": """<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap>
+    <loc>{root}sitemaps/review.xml</loc>
+  </sitemap>
+  <sitemap><loc>/sitemaps/archive.xml</loc></sitemap>
+</sitemapindex>
+""",
+    "sitemaps/review.xml": """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>{root}review/r230301a.htm</loc></url>
+  <url><loc>{root}review/r230301b.pdf</loc></url>
+  <url><loc>{root}about/index.htm</loc></url>
+</urlset>
+""",
+    "sitemaps/archive.xml": """<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>{root}sitemap.xml</loc></sitemap>
+  <sitemap><loc>{root}sitemaps/2019.xml</loc></sitemap>
+  <sitemap><loc>{root}sitemaps/missing.xml</loc></sitemap>
+</sitemapindex>
+""",
+    "sitemaps/2019.xml": """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>{root}review/r191231c.htm</loc></url>
+</urlset>
+""",
+    "doclist/cbspeeches.rss": """<?xml version="1.0" encoding="UTF-8"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+  <item rdf:about="{root}review/r230401a.htm">
+    <title>Ann Poe: Monetary policy</title>
+    <link>{root}review/r230401a.htm</link>
+  </item>
+  <item rdf:about="{root}review/r230301a.htm">
+    <link>{root}review/r230301a.htm</link>
+  </item>
+</rdf:RDF>
+""",
+}
+
+
+def _scrape(server, wd, **kwargs):
+    kwargs = {"rate_limit": None, **kwargs}
+    return async_scraper.bis_scraper_async(str(wd), url=server.url, **kwargs)
+
+
+### Tests
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    """Shortens the backoff between retries to milliseconds."""
+    retry_delay = rate_control.AdaptiveLimiter.retry_delay
+
+    def fast(self, attempt, retry_after=None):
+        return retry_delay(self, attempt, retry_after, base=0.001)
+
+    monkeypatch.setattr(rate_control.AdaptiveLimiter, "retry_delay", fast)
+
+
+@pytest.mark.integration
+def test_output_layout(tmp_path):
+    with StubServer(SPEECHES) as server:
+        stats = _scrape(server, tmp_path, speech_ids=list(SPEECHES) + ["230501a"])
+
+    # One pdf per speech, linked to its content-addressed object
+    for speech_id, (_, pdf) in SPEECHES.items():
+        sha = hashlib.sha256(pdf).hexdigest()
+        with open(tmp_path / f"{speech_id}.pdf", "rb") as f:
+            assert f.read() == pdf
+        assert (tmp_path / "objects" / f"{sha}.pdf").exists()
+    assert not (tmp_path / "230501a.pdf").exists()
+    assert not list((tmp_path / "objects").glob("*.tmp"))
+
+    meta = meta_store.read_meta(str(tmp_path))
+    assert list(meta["filename"]) == ["230301a", "230301b", "230401a"]
+    assert list(meta["institution"]) == [
+        "bank of canada",
+        "bank of japan",
+        "deutsche bundesbank",
+    ]
+    assert list(meta["name"]) == ["Jane Doe", "John Roe", "Ann Poe"]
+    assert list(meta["sha256"]) == [
+        hashlib.sha256(SPEECHES[i][1]).hexdigest() for i in meta["filename"]
+    ]
+    assert stats["get"] == 7
+
+
+@pytest.mark.integration
+def test_retries_on_errors(tmp_path):
+    failures = {"230301a.htm": [503, 500], "230301a.pdf": [429], "230301b.htm": [502]}
+    with StubServer(SPEECHES, failures) as server:
+        stats = _scrape(server, tmp_path, speech_ids=["230301a", "230301b"])
+
+    assert server.requests["230301a.htm"] == 3
+    assert server.requests["230301a.pdf"] == 2
+    assert server.requests["230301b.htm"] == 2
+    assert stats["retries"] == 4
+    assert stats["throttled"] == 2
+    assert (tmp_path / "230301a.pdf").exists()
+    assert (tmp_path / "230301b.pdf").exists()
+
+
+@pytest.mark.integration
+def test_retries_give_up(tmp_path):
+    failures = {"230301a.htm": [503] * 6}
+    with StubServer(SPEECHES, failures) as server:
+        _scrape(
+            server,
+            tmp_path,
+            speech_ids=["230301a"],
+            index_path=str(tmp_path / "index.sqlite"),
+        )
+
+    # Not recorded as scraped after max_retries, so the next run tries again
+    assert server.requests["230301a.htm"] == 6
+    assert not (tmp_path / "230301a.pdf").exists()
+    conn = crawl_index.open_index(str(tmp_path / "index.sqlite"))
+    assert crawl_index.known_ids(conn) == set()
+    conn.close()
+
+
+@pytest.mark.integration
+def test_since_last_resumes_from_high_water_mark(tmp_path):
+    # The last three dates that are probed with small=1 (first day of the month)
+    *_, old, last, new = lists.date_list(1)
+    speeches = {
+        old + "a": fixture_speech("Jane Doe", "Bank of Canada"),
+        last + "a": fixture_speech("John Roe", "Bank of Japan"),
+    }
+    index_path = str(tmp_path / "index.sqlite")
+
+    with StubServer(speeches) as server:
+        _scrape(server, tmp_path, index_path=index_path, speech_ids=list(speeches))
+    conn = crawl_index.open_index(index_path)
+    assert crawl_index.high_water_mark(conn) == last
+    conn.close()
+
+    # A speech is added to the last date and one to a later date
+    speeches[last + "b"] = fixture_speech("Ann Poe", "Deutsche Bundesbank")
+    speeches[new + "a"] = fixture_speech("Max Moe", "Bank of Italy")
+    with StubServer(speeches) as server:
+        _scrape(server, tmp_path, index_path=index_path, since_last=True)
+
+    # Only the dates from the high-water mark onwards are probed, known speeches are
+    # not requested again
+    probed = {name[:6] for name in server.requests}
+    assert probed == {last, new}
+    assert server.requests[last + "a.htm"] == 0
+    assert server.requests[last + "b.htm"] == 1
+    assert server.requests[last + "c.htm"] == 1
+    assert server.requests[new + "a.pdf"] == 1
+    for speech_id in speeches:
+        assert (tmp_path / f"{speech_id}.pdf").exists()
+
+    conn = crawl_index.open_index(index_path)
+    assert crawl_index.high_water_mark(conn) == new
+    assert crawl_index.known_ids(conn) == set(speeches)
+    conn.close()
+
+    rows = sqlite3.connect(tmp_path / meta_store.FILE_NAME).execute(
+        "SELECT COUNT(*) FROM speeches",
+    )
+    assert rows.fetchone()[0] == 4
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("probe", ["get", "head"])
+def test_cached_misses_of_high_water_mark_are_requested_again(tmp_path, probe):
+    *_, old, last = lists.date_list(1)
+    speeches = {
+        old + "a": fixture_speech("Jane Doe", "Bank of Canada"),
+        last + "a": fixture_speech("John Roe", "Bank of Japan"),
+    }
+    index_path = str(tmp_path / "index.sqlite")
+    cache = http_cache.HttpCache(str(tmp_path / "cache"))
+    kwargs = {"index_path": index_path, "cache": cache, "probe": probe}
+
+    with StubServer(speeches) as server:
+        _scrape(server, tmp_path, **kwargs)
+
+        # A speech is posted later on the date of the high-water mark, whose miss is
+        # still in the negative cache
+        speeches[last + "b"] = fixture_speech("Ann Poe", "Deutsche Bundesbank")
+        server.requests.clear()
+        _scrape(server, tmp_path, **kwargs)
+
+    # Misses of older dates are served from the cache
+    assert server.requests[last + "b.htm"] >= 1
+    assert server.requests[old + "b.htm"] == 0
+    assert (tmp_path / f"{last}b.pdf").exists()
+
+
+@pytest.mark.integration
+def test_discovered_speeches_before_high_water_mark(tmp_path):
+    *_, old, last = lists.date_list(1)
+    speeches = {last + "a": fixture_speech("John Roe", "Bank of Japan")}
+    index_path = str(tmp_path / "index.sqlite")
+    cache = http_cache.HttpCache(str(tmp_path / "cache"))
+    kwargs = {"index_path": index_path, "cache": cache, "since_last": True}
+
+    with StubServer(speeches) as server:
+        _scrape(server, tmp_path, speech_ids=[old + "a", last + "a"], **kwargs)
+
+        # A speech of an older date is posted late and listed by the server, its
+        # earlier miss is still in the cache
+        speeches[old + "a"] = fixture_speech("Jane Doe", "Bank of Canada")
+        server.requests.clear()
+        _scrape(server, tmp_path, speech_ids=[old + "a", last + "a"], **kwargs)
+
+    # Discovered ids are only filtered by the known speeches, not by date
+    assert server.requests[old + "a.htm"] == 1
+    assert server.requests[last + "a.htm"] == 0
+    assert (tmp_path / f"{old}a.pdf").exists()
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ("page", "expected"),
+    [
+        ("sitemap.xml", set()),
+        ("sitemaps/review.xml", {"230301a", "230301b"}),
+        ("sitemaps/2019.xml", {"191231c"}),
+        ("doclist/cbspeeches.rss", {"230401a", "230301a"}),
+    ],
+)
+def test_extract_speech_ids(page, expected):
+    content = LISTINGS[page].format(root="https://www.bis.org/")
+    assert discovery.extract_speech_ids(content) == expected
+    assert discovery.extract_speech_ids(content.encode()) == expected
+
+
+@pytest.mark.integration
+def test_discovery_follows_nested_sitemaps(tmp_path):
+    with StubServer(SPEECHES, pages=LISTINGS) as server:
+        index_urls = [
+            server.root + "sitemap.xml",
+            server.root + "doclist/cbspeeches.rss",
+        ]
+        speech_ids = discovery.discover_speech_ids(index_urls)
+
+        # Every listing is requested once, also if it is linked more than once
+        for page in LISTINGS:
+            assert server.requests[page] == 1
+        assert server.requests["sitemaps/missing.xml"] == 1
+        assert speech_ids == ["191231c", "230301a", "230301b", "230401a"]
+
+        # The discovered speeches are downloaded, those that are not available are
+        # recorded as misses
+        index_path = str(tmp_path / "index.sqlite")
+        _scrape(server, tmp_path, speech_ids=speech_ids, index_path=index_path)
+
+    conn = crawl_index.open_index(index_path)
+    assert crawl_index.known_ids(conn) == {"230301a", "230301b", "230401a"}
+    conn.close()
@@ -0,0 +1,175 @@
+# Import packages
+import os
+
+import pytest
+
+# Import scripts
+import epp_final_project.scrape_bis.bis_scraper as bis
+import epp_final_project.scrape_bis.meta_store as meta_store
+import epp_final_project.scrape_bis.pdf_extract as pdf_extract
+import epp_final_project.scrape_bis.pdf_store as pdf_store
+import epp_final_project.scrape_bis.speech_archive as speech_archive
+import epp_final_project.scrape_bis.text_cache as text_cache
+
+### Pdf folder as left by the scrapers, with a stub backend
+
+
+def _stub(path_pdf):
+    with open(path_pdf, encoding="utf-8") as f:
+        yield from f.read().split("|")
+
+
+def _store_pdf(wd, speech_id, text):
+    """Stores a pdf for a speech as the scrapers do."""
+    writer = pdf_store.PdfWriter(str(wd))
+    writer.reset()
+    writer.write(text.encode("utf-8"))
+    _, sha = writer.commit(speech_id)
+    store = meta_store.open_store(str(wd))
+    meta_store.write_speech(store, speech_id, "NA", "bank of canada", "meta")
+    meta_store.write_hash(store, speech_id, sha)
+    store.close()
+    return sha
+
+
+@pytest.fixture()
+def folders(tmp_path, monkeypatch):
+    monkeypatch.setitem(pdf_extract.BACKENDS, "stub", _stub)
+    monkeypatch.setitem(pdf_extract.PACKAGES, "stub", "pytest")
+    wd, out = tmp_path / "pdf", tmp_path / "txt"
+    wd.mkdir()
+    out.mkdir()
+    _store_pdf(wd, "230301a", "one|two")
+    _store_pdf(wd, "230301b", "three")
+    _store_pdf(wd, "230302a", "one|two")
+    return wd, out, tmp_path / "text_cache"
+
+
+def _convert(folders, **kwargs):
+    wd, out, path_cache = folders
+    cache = text_cache.TextCache(path_cache, "stub", **kwargs)
+    failures = bis.pdf_to_txt(str(wd), str(out), 2, 10, "stub", cache, **kwargs)
+    return failures, cache
+
+
+def _text(out, speech_id):
+    with open(out / f"{speech_id}.pdf.txt", encoding="utf-8") as f:
+        return f.read()
+
+
+def _extracted(cache):
+    return sorted(os.listdir(cache.folder))
+
+
+### Tests
+
+
+@pytest.mark.unit
+def test_pdf_to_txt_from_meta_store(folders, capsys):
+    wd, out, _ = folders
+
+    # The texts are extracted from the objects, the links are not needed
+    for speech_id in ["230301a", "230301b", "230302a"]:
+        os.remove(wd / f"{speech_id}.pdf")
+    failures, cache = _convert(folders)
+    assert failures == {}
+    assert _text(out, "230301a") == "one\ftwo\f"
+    assert _text(out, "230301b") == "three\f"
+    assert _text(out, "230302a") == "one\ftwo\f"
+    assert len(_extracted(cache)) == 2
+    assert "2 pdfs extracted" in capsys.readouterr().out
+
+    meta = meta_store.read_meta(str(wd)).set_index("filename")
+    assert meta.loc["230301a", "pages"] == 2
+    assert meta.loc["230301b", "pages"] == 1
+
+    # Nothing to do on the second run
+    _convert(folders)
+    assert "0 updated, 0 pdfs extracted, 2 cached" in capsys.readouterr().out
+
+
+@pytest.mark.unit
+def test_pdf_to_txt_extracts_again(folders, capsys):
+    wd, out, _ = folders
+    _, cache = _convert(folders)
+
+    # A changed pdf
+    _store_pdf(wd, "230301b", "four|five|six")
+    _convert(folders)
+    assert _text(out, "230301b") == "four\ffive\fsix\f"
+    assert "1 pdfs extracted" in capsys.readouterr().out
+
+    # A lost text
+    os.remove(cache.path_text(meta_store.read_hashes(str(wd))["230301a"]))
+    _convert(folders)
+    assert _text(out, "230301a") == "one\ftwo\f"
+    assert "1 pdfs extracted" in capsys.readouterr().out
+
+    # Another backend version or cap
+    _convert(folders, max_pages=1)
+    assert _text(out, "230301a") == "one\f"
+    assert _text(out, "230301b") == "four\f"
+    assert "3 updated, 2 pdfs extracted" in capsys.readouterr().out
+
+
+@pytest.mark.unit
+def test_pdf_to_txt_missing_pdf(folders):
+    wd, out, _ = folders
+    sha = meta_store.read_hashes(str(wd))["230301b"]
+    os.remove(wd / pdf_store.OBJECTS / f"{sha}.pdf")
+    os.remove(wd / "230301b.pdf")
+    failures, _ = _convert(folders)
+    assert failures == {"230301b.pdf": "pdf not found"}
+    assert _text(out, "230301a") == "one\ftwo\f"
+
+
+@pytest.mark.unit
+def test_pdf_to_txt_fills_missing_pages(folders):
+    wd, out, _ = folders
+    _convert(folders)
+
+    # Scraping the page of a speech again keeps the hash and the pages of its pdf
+    store = meta_store.open_store(str(wd))
+    meta_store.write_speech(store, "230301a", "Jane Doe", "bank of japan", "meta")
+    meta = meta_store.read_meta(str(wd)).set_index("filename")
+    assert meta.loc["230301a", "institution"] == "bank of japan"
+    assert meta.loc["230301a", "sha256"] == _store_pdf(wd, "230301c", "one|two")
+    assert meta.loc["230301a", "pages"] == 2
+
+    # Speeches without page count (e.g. from older stores) get it although their
+    # text is already linked
+    with store:
+        store.execute("UPDATE speeches SET pages = NULL WHERE id = '230301b'")
+    store.close()
+    _convert(folders)
+    meta = meta_store.read_meta(str(wd)).set_index("filename")
+    assert meta.loc["230301b", "pages"] == 1
+    assert meta.loc["230301c", "pages"] == 2
+
+
+def _shard_sizes(path_archive):
+    return {p.name: p.stat().st_size for p in path_archive.glob("*.zst")}
+
+
+@pytest.mark.unit
+def test_pack_texts_skips_unchanged_texts(folders, tmp_path):
+    wd, out, _ = folders
+    path_archive = tmp_path / "speeches"
+    _convert(folders)
+    assert speech_archive.pack_texts(str(out), str(path_archive)) == 3
+    sizes = _shard_sizes(path_archive)
+
+    # The texts are linked again, but the shards do not grow
+    _convert(folders)
+    assert speech_archive.pack_texts(str(out), str(path_archive)) == 0
+    assert _shard_sizes(path_archive) == sizes
+    assert not list(out.glob("*.pdf.txt"))
+
+    # Only a changed text is appended
+    _store_pdf(wd, "230301b", "four|five")
+    _convert(folders)
+    assert speech_archive.pack_texts(str(out), str(path_archive)) == 1
+    archive = speech_archive.SpeechArchive(str(path_archive))
+    assert archive.get("230301b") == "four\ffive\f"
+    assert archive.get("230301a") == "one\ftwo\f"
+    archive.close()
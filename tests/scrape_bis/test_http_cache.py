@@ -0,0 +1,84 @@
+# Import packages
+import os
+import types
+import unittest.mock
+
+import pytest
+
+# Import scripts
+import epp_final_project.scrape_bis.discovery as discovery
+import epp_final_project.scrape_bis.http_cache as http_cache
+
+### Tests
+
+
+def _disk_size(cache):
+    return sum(size for _, _, size in cache._entries())
+
+
+@pytest.mark.unit
+def test_size_on_overwrite(tmp_path):
+    cache = http_cache.HttpCache(str(tmp_path / "cache"))
+    cache.store("https://www.bis.org/a.htm", 200, {"ETag": '"1"'}, b"x" * 1000)
+    cache.store("https://www.bis.org/a.htm", 200, {"ETag": '"2"'}, b"x" * 10)
+    assert cache.size == _disk_size(cache)
+
+    for i, size in enumerate([500, 50]):
+        path = tmp_path / f"speech{i}.pdf"
+        path.write_bytes(b"y" * size)
+        cache.store_file("https://www.bis.org/a.pdf", 200, {}, str(path))
+    assert cache.size == _disk_size(cache)
+
+
+@pytest.mark.unit
+def test_refresh(tmp_path):
+    cache = http_cache.HttpCache(str(tmp_path / "cache"), max_age=0)
+    url = "https://www.bis.org/a.htm"
+    cache.store(url, 200, {"ETag": '"1"'}, b"page")
+    entry = cache.lookup(url)
+    assert not cache.is_fresh(entry)
+
+    cache.max_age = 60
+    cache.refresh(url, entry)
+    entry = cache.lookup(url)
+    assert cache.is_fresh(entry)
+    assert entry["etag"] == '"1"'
+    assert entry["content"] == b"page"
+    assert cache.size == _disk_size(cache)
+    assert not [f for f in os.listdir(os.path.dirname(cache._key(url))) if ".tmp" in f]
+
+
+class StubSession:
+    """Answers GET requests like requests.get and records the request headers."""
+
+    def __init__(self, status, content=b"", headers=None):
+        self.status = status
+        self.content = content
+        self.headers = headers or {}
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append(headers)
+        return types.SimpleNamespace(
+            status_code=self.status,
+            content=self.content,
+            headers=self.headers,
+        )
+
+
+@pytest.mark.unit
+def test_discovery_revalidates_fresh_listings(tmp_path):
+    cache = http_cache.HttpCache(str(tmp_path / "cache"))
+    url = "https://www.bis.org/doclist/cbspeeches.rss"
+    cache.store(url, 200, {"ETag": '"1"'}, b"review/r230301a.htm")
+
+    # A fresh entry is served from the cache by default ...
+    session = StubSession(304)
+    assert http_cache.cached_get(url, cache, session) == (200, b"review/r230301a.htm")
+    assert session.requests == []
+
+    # ... but the listing pages are always revalidated
+    session = StubSession(200, b"review/r230301a.htm review/r230302a.htm")
+    with unittest.mock.patch("requests.get", session.get):
+        assert discovery.discover_speech_ids([url], cache) == ["230301a", "230302a"]
+    assert session.requests == [{"If-None-Match": '"1"'}]
@@ -0,0 +1,118 @@
+# Import packages
+import os
+import subprocess
+import time
+
+import pytest
+
+# Import scripts
+import epp_final_project.scrape_bis.pdf_extract as pdf_extract
+
+### Stub backends (the worker processes are forked, so they see the patched BACKENDS)
+
+
+def _pages(path_pdf):
+    with open(path_pdf, encoding="utf-8") as f:
+        yield from f.read().split("|")
+
+
+def _hangs_in_child(path_pdf):
+    # Like textract: the text comes from a child process, here one that never ends
+    with open(path_pdf + ".pid", "w") as f:
+        process = subprocess.Popen(["sleep", "600"])
+        f.write(str(process.pid))
+    process.wait()
+    yield ""
+
+
+def _crashes(path_pdf):
+    os._exit(3)
+    yield ""
+
+
+def _stub(path_pdf):
+    name = os.path.basename(path_pdf)
+    if name.startswith("hang"):
+        return _hangs_in_child(path_pdf)
+    if name.startswith("crash"):
+        return _crashes(path_pdf)
+    return _pages(path_pdf)
+
+
+@pytest.fixture()
+def pdfs(tmp_path, monkeypatch):
+    monkeypatch.setitem(pdf_extract.BACKENDS, "stub", _stub)
+    paths = []
+    for name in ["a.pdf", "hang.pdf", "b.pdf", "crash.pdf", "c.pdf"]:
+        (tmp_path / name).write_text(f"{name} page 1|{name} page 2")
+        paths.append(str(tmp_path / name))
+    return paths
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # A killed child that is not reaped yet is a zombie
+    with open(f"/proc/{pid}/stat") as f:
+        return f.read().split()[2] != "Z"
+
+
+### Tests
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(not hasattr(os, "killpg"), reason="needs process groups")
+@pytest.mark.parametrize("workers", [1, 3])
+def test_timeout_kills_worker_and_its_children(pdfs, workers):
+    paths_out = [path + ".txt" for path in pdfs]
+    start = time.monotonic()
+    errors = pdf_extract.extract_pdfs(pdfs, paths_out, workers, 1, "stub")
+    assert time.monotonic() - start < 10
+
+    assert errors[1] == "timeout after 1s"
+    assert errors[3] == "worker exited with code 3"
+    for i in [0, 2, 4]:
+        assert errors[i] is None
+        with open(paths_out[i], encoding="utf-8") as f:
+            name = os.path.basename(pdfs[i])
+            assert f.read() == f"{name} page 1\f{name} page 2\f"
+    for i in [1, 3]:
+        assert not os.path.exists(paths_out[i])
+        assert not os.path.exists(paths_out[i] + ".tmp")
+
+    # The child process of the worker that timed out was killed as well
+    with open(pdfs[1] + ".pid") as f:
+        pid = int(f.read())
+    time.sleep(0.1)
+    assert not _alive(pid)
+
+
+@pytest.mark.unit
+def test_caps(pdfs):
+    errors = pdf_extract.extract_pdfs(
+        pdfs[:1], [pdfs[0] + ".txt"], 1, None, "stub", max_pages=1
+    )
+    assert errors == [None]
+    with open(pdfs[0] + ".txt", encoding="utf-8") as f:
+        assert f.read() == "a.pdf page 1\f"
+    assert pdf_extract.extract_pdfs([], [], None, 1, "stub") == []
+
+
+@pytest.mark.unit
+def test_max_bytes(pdfs, tmp_path):
+    (tmp_path / "d.pdf").write_text("Zürich|Frühjahr", encoding="utf-8")
+    full = "Zürich\fFrühjahr\f".encode()
+    for max_bytes in range(len(full) + 2):
+        path_pdf, path_out = str(tmp_path / "d.pdf"), str(tmp_path / "d.txt")
+        error = pdf_extract.extract_pdf(path_pdf, path_out, "stub", None, max_bytes)
+        assert error is None
+        with open(path_out, "rb") as f:
+            text = f.read()
+
+        # The text (with the form feed of the cut page) fits into max_bytes
+        assert len(text) <= max_bytes
+        assert text.rstrip(b"\f") == full[: len(text.rstrip(b"\f"))]
+        if max_bytes >= len(full):
+            assert text == full
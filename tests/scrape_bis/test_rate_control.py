@@ -0,0 +1,196 @@
+# Import packages
+import asyncio
+
+import pytest
+
+# Import scripts
+import epp_final_project.scrape_bis.rate_control as rate_control
+
+### Stub host that answers with a given latency and status on a simulated clock
+
+
+class FakeClock:
+    """Replaces time.monotonic and asyncio.sleep, so that no test waits."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleep = asyncio.sleep
+
+    def monotonic(self):
+        return self.now
+
+    async def advance(self, seconds):
+        self.now += seconds
+        await self.sleep(0)
+
+
+class StubHost:
+    """Sends requests through a limiter and injects latency and status codes.
+
+    Args:
+        limiter: rate_control.AdaptiveLimiter
+        clock: FakeClock
+
+    """
+
+    def __init__(self, limiter, clock):
+        self.limiter = limiter
+        self.clock = clock
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def request(self, latency=0.1, status=200):
+        await self.limiter.acquire()
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await self.clock.advance(latency)
+        finally:
+            self.in_flight -= 1
+            await self.limiter.release(latency, status)
+
+    async def burst(self, n, latency, status, spread=0.01):
+        """Sends n requests at once whose responses arrive within spread seconds."""
+        for _ in range(n):
+            await self.limiter.acquire()
+        await self.clock.advance(latency)
+        for _ in range(n):
+            await self.clock.advance(spread)
+            await self.limiter.release(latency, status)
+
+    def run(self, *requests):
+        """Sends the requests (latency, status) one after the other."""
+
+        async def run():
+            for latency, status in requests:
+                await self.request(latency, status)
+
+        asyncio.run(run())
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_control.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_control.asyncio, "sleep", clock.advance)
+    return clock
+
+
+def stub_host(clock, **kwargs):
+    return StubHost(rate_control.AdaptiveLimiter(**kwargs), clock)
+
+
+### Tests
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("status", [429, 503, None])
+def test_halves_at_most_once_per_latency_window(clock, status):
+    host = stub_host(clock, initial_limit=16, max_limit=16, breaker_threshold=100)
+
+    # A burst of throttled responses within one round trip (1s) halves the limit once
+    asyncio.run(host.burst(6, 1.0, status))
+    assert host.limiter.limit == 8
+
+    # The next round trip halves it again
+    asyncio.run(host.burst(4, 1.0, status))
+    assert host.limiter.limit == 4
+    assert host.limiter.in_flight == 0
+
+
+@pytest.mark.unit
+def test_latency_spike_halves_limit(clock):
+    host = stub_host(clock, initial_limit=8, latency_tolerance=2.0)
+    host.run((0.1, 200), (0.3, 200))
+    assert 4 <= host.limiter.limit < 5
+    assert host.limiter.counters["errors"] == 0
+
+
+@pytest.mark.unit
+def test_additive_growth_after_successes(clock):
+    host = stub_host(clock, initial_limit=4, max_limit=8)
+
+    # About one more request in flight per round trip (limit successes)
+    host.run(*[(0.1, 200)] * 4)
+    assert 4.9 < host.limiter.limit < 5
+
+    host.run(*[(0.1, 200)] * 100)
+    assert host.limiter.limit == 8
+
+
+@pytest.mark.unit
+def test_limit_bounds_requests_in_flight(clock):
+    host = stub_host(clock, initial_limit=3, max_limit=3)
+
+    async def burst():
+        await asyncio.gather(*[host.request(0.1, 200) for _ in range(20)])
+
+    asyncio.run(burst())
+    assert host.max_in_flight == 3
+    assert host.limiter.in_flight == 0
+
+
+@pytest.mark.unit
+def test_circuit_breaker_opens_and_half_opens(clock):
+    host = stub_host(clock, breaker_threshold=3, breaker_cooldown=30)
+    limiter = host.limiter
+
+    # Consecutive failures open the breaker, a success in between resets the count
+    host.run((0.1, 503), (0.1, 503), (0.1, 200), (0.1, 503), (0.1, 503))
+    assert not limiter.snapshot()["breaker_open"]
+    host.run((0.1, 429))
+    assert limiter.snapshot()["breaker_open"]
+    assert limiter.snapshot()["breaker_opened"] == 1
+
+    # No request is sent before the cooldown has passed, then the breaker is
+    # half-open and the successful trial request closes it
+    opened = clock.now
+    host.run((0.1, 200))
+    assert clock.now - opened >= 30
+    assert not limiter.half_open
+    assert not limiter.snapshot()["breaker_half_open"]
+    host.run((0.1, 200), (0.1, 200))
+    assert limiter.snapshot()["breaker_opened"] == 1
+
+
+@pytest.mark.unit
+def test_half_open_breaker_reopens_on_failure(clock):
+    host = stub_host(clock, initial_limit=8, breaker_threshold=2, breaker_cooldown=30)
+    limiter = host.limiter
+    host.run((0.1, 503), (0.1, 503))
+    assert limiter.snapshot()["breaker_open"]
+
+    # After the cooldown a single trial request is let through ...
+    async def trial():
+        await asyncio.gather(*[host.request(0.1, 503) for _ in range(4)])
+
+    clock.now += 30
+    assert limiter.snapshot()["breaker_half_open"]
+    reopened = clock.now
+    asyncio.run(trial())
+    assert host.max_in_flight == 1
+
+    # ... and each failed trial opens the breaker again right away
+    assert limiter.snapshot()["breaker_opened"] == 5
+    assert clock.now - reopened >= 3 * 30
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("attempt", range(10))
+def test_retry_delay_within_jittered_bounds(attempt):
+    limiter = rate_control.AdaptiveLimiter()
+    delays = [limiter.retry_delay(attempt, base=0.5, cap=60) for _ in range(1000)]
+    assert min(delays) >= 0
+    assert max(delays) <= min(60, 0.5 * 2**attempt)
+
+    # Full jitter spreads the delays over the whole interval
+    assert max(delays) - min(delays) > 0.5 * min(60, 0.5 * 2**attempt)
+    assert limiter.snapshot()["retries"] == 1000
+
+
+@pytest.mark.unit
+def test_retry_delay_respects_retry_after():
+    limiter = rate_control.AdaptiveLimiter()
+    delays = [limiter.retry_delay(3, retry_after=10) for _ in range(1000)]
+    assert min(delays) >= 10
+    assert max(delays) <= max(10, 0.5 * 2**3)
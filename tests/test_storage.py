@@ -0,0 +1,77 @@
+# Import packages
+import numpy as np
+import pandas as pd
+import pytest
+
+# Import scripts
+import epp_final_project.storage as storage
+import epp_final_project.tokens as tokens
+
+### Chunks of the dataset as written by data_management
+
+
+def chunks(vocab):
+    documents = [
+        (2019, ["inflation", "price", "inflation"]),
+        (2019, []),
+        (2020, ["growth"]),
+        (2021, ["economic", "growth", "climate", "growth"]),
+        (2020, []),
+    ]
+    frames = []
+    for i in range(0, len(documents), 2):
+        frames.append(
+            pd.DataFrame(
+                {
+                    "filename": [f"r{i + j}" for j in range(len(documents[i : i + 2]))],
+                    "year": [year for year, _ in documents[i : i + 2]],
+                    "lemma_ids": [vocab.encode(lst) for _, lst in documents[i : i + 2]],
+                },
+            ),
+        )
+    return frames
+
+
+### Tests
+
+
+@pytest.mark.unit
+def test_read_tokens(tmp_path):
+    vocab = tokens.Vocabulary()
+    frames = chunks(vocab)
+    storage.write_parquet_batches(frames, tmp_path / "data")
+
+    # The documents in the order in which the dataset is read
+    df = storage.read_parquet(tmp_path / "data", columns=["filename", "lemma_ids"])
+    corpus = storage.read_tokens(tmp_path / "data", "lemma_ids", vocab)
+    assert corpus.ids.dtype == np.int32
+    assert len(corpus) == len(df)
+    for i, ids in enumerate(df["lemma_ids"]):
+        assert corpus[i] == [vocab.words[token_id] for token_id in ids]
+    assert corpus.count(["growth"]).tolist() == [
+        sum(vocab.words[t] == "growth" for t in ids) for ids in df["lemma_ids"]
+    ]
+
+
+@pytest.mark.unit
+def test_write_parquet_batches_empty_columns_in_first_chunk(tmp_path):
+    # Only missing values and empty lists in the first chunk
+    first = pd.DataFrame(
+        {"year": [2019, 2019], "name": [None, None], "lemma_sep": [[], []]},
+    )
+    second = pd.DataFrame(
+        {"year": [2020], "name": ["Jane Doe"], "lemma_sep": [["growth", "price"]]},
+    )
+    storage.write_parquet_batches([first, second], tmp_path / "data")
+
+    df = storage.read_parquet(tmp_path / "data")
+    assert df["year"].tolist() == [2019, 2019, 2020]
+    assert df["name"].isna().tolist() == [True, True, False]
+    assert df["name"].iloc[2] == "Jane Doe"
+    assert [list(lst) for lst in df["lemma_sep"]] == [[], [], ["growth", "price"]]
+
+
+@pytest.mark.unit
+def test_write_parquet_batches_no_chunks(tmp_path):
+    storage.write_parquet_batches(iter([]), tmp_path / "data")
+    assert list((tmp_path / "data").iterdir()) == []
@@ -0,0 +1,108 @@
+# Import packages
+import collections
+import random
+
+import numpy as np
+import pytest
+
+# Import scripts
+import epp_final_project.tokens as tokens
+
+### Random corpus and the counts as computed on lists of lemmas before TokenCorpus
+
+WORDS = ["growth", "economic", "inflation", "price", "bank", "policy", "rate", "euro"]
+
+
+def count_keywords(keywords, lst):
+    count = 0
+    for word in lst:
+        if word in keywords:
+            count += 1
+    return count
+
+
+def random_documents(seed, n=50):
+    rng = random.Random(seed)
+    return [rng.choices(WORDS, k=rng.choice([0, 1, 5, 40])) for _ in range(n)]
+
+
+def corpus_of(documents, sliced):
+    """Encodes the documents, as a slice of a larger corpus if sliced."""
+    vocab = tokens.Vocabulary()
+    if not sliced:
+        return tokens.TokenCorpus.from_arrays(map(vocab.encode, documents), vocab)
+
+    # Documents before and after the slice (e.g. other row groups of a list column)
+    before, after = [["bank"] * 3, ["price", "rate"]], [["growth"] * 4]
+    corpus = tokens.TokenCorpus.from_arrays(
+        map(vocab.encode, before + documents + after),
+        vocab,
+    )
+    offsets = corpus.offsets[len(before) : len(before) + len(documents) + 1]
+    assert offsets[0] != 0
+    return tokens.TokenCorpus(corpus.ids, offsets, vocab)
+
+
+### Tests
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("sliced", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_count(seed, sliced):
+    documents = random_documents(seed)
+    corpus = corpus_of(documents, sliced)
+    assert len(corpus) == len(documents)
+    for keywords in [["growth", "economic"], ["price"], ["unknown"], []]:
+        expected = [count_keywords(keywords, lst) for lst in documents]
+        assert corpus.count(keywords).tolist() == expected
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("sliced", [False, True])
+def test_frequencies_and_most_common(sliced):
+    documents = random_documents(0)
+    corpus = corpus_of(documents, sliced)
+    counter = collections.Counter(word for lst in documents for word in lst)
+    frequencies = corpus.frequencies()
+    assert {
+        w: int(frequencies[i]) for w, i in corpus.vocab.ids.items() if frequencies[i]
+    } == dict(counter)
+    if not sliced:
+        # Ties are ordered by first occurrence, as by Counter
+        for n in [1, 3, len(WORDS), 100]:
+            assert corpus.most_common(n) == counter.most_common(n)
+
+
+@pytest.mark.unit
+def test_documents_and_lengths():
+    documents = random_documents(1)
+    corpus = corpus_of(documents, sliced=True)
+    assert [corpus[i] for i in range(len(corpus))] == documents
+    assert corpus.lengths().tolist() == [len(lst) for lst in documents]
+    assert np.array_equal(
+        corpus.vocab.lookup(["rate", "unknown"]), [corpus.vocab.ids["rate"]]
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("sliced", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_count_topics(seed, sliced):
+    documents = random_documents(seed)
+    corpus = corpus_of(documents, sliced)
+
+    # A word in two topics, words that are not in the corpus and an empty topic
+    topics = {
+        "growth": ["growth", "economic"],
+        "inflation": ["inflation", "price"],
+        "policy": ["policy", "rate", "price"],
+        "climate": ["environment", "climate", "green"],
+        "empty": [],
+    }
+    counts = corpus.count_topics(topics)
+    assert counts.shape == (len(documents), len(topics))
+    for i, keywords in enumerate(topics.values()):
+        expected = [count_keywords(keywords, lst) for lst in documents]
+        assert counts[:, i].tolist() == expected
+        assert corpus.count(keywords).tolist() == expected